@@ -1,24 +1,40 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from google.cloud import bigquery
+from google.cloud import bigquery_storage
 from datetime import datetime
 import os
+import time
+import contextlib
+import tempfile
+import math
+from concurrent.futures import ThreadPoolExecutor
 
 # Imports locais
 from config import (
-    PAGE_CONFIG, CUSTOM_CSS, COLORS, QUERY_MAIN,
-    QUERY_USUARIOS_INATIVOS, QUERY_USUARIOS_RESPONDERAM,
-    CLASSIFICACAO_EMOJI, FLAG_EMOJI, STOPWORDS_PT, CACHE_TTL
+    PAGE_CONFIG, CUSTOM_CSS, COLORS, QUERY_MAIN, QUERY_OPCOES_FILTROS, FILTROS_QUERY,
+    TODAS_OPCOES, FILTROS_TODAS_OPCOES,
+    QUERY_USUARIOS_INATIVOS, QUERY_USUARIOS_RESPONDERAM, COLUNAS_CATEGORICAS_USUARIOS,
+    COLUNAS_USUARIOS_INATIVOS, COLUNAS_USUARIOS_RESPONDERAM,
+    CLASSIFICACAO_EMOJI, FLAG_EMOJI, STOPWORDS_PT, CACHE_TTL, CACHE_DISCO_ARQUIVO,
+    CACHE_DISCO_INATIVOS, CACHE_DISCO_RESPONDERAM,
+    TAMANHO_PAGINA_CLIENTES, TAMANHO_PAGINA_USUARIOS
 )
 from utils import (
-    calcular_nps, calcular_nps_ponderado, calcular_distribuicao_classificacao,
-    formatar_numero, formatar_data, truncar_texto, adicionar_emoji_classificacao,
-    adicionar_emoji_flag, get_cor_nps, get_cor_classificacao, get_cor_nota,
-    criar_distribuicao_notas, calcular_nps_por_segmento, criar_heatmap_data,
+    calcular_resumo_executivo,
+    formatar_numero, formatar_numero_serie, formatar_data_serie,
+    truncar_texto_serie, adicionar_emoji_serie, get_cor_nps, get_cor_classificacao, get_cor_nota,
+    get_cores_nps, get_cores_nota,
+    criar_distribuicao_notas, calcular_nps_por_segmentos,
+    criar_heatmap_data, contar_top_n,
     filtrar_detratores_prioritarios, processar_comentarios_por_classificacao,
-    gerar_texto_wordcloud, validar_dados
+    gerar_texto_wordcloud, validar_dados, otimizar_tipos, adicionar_colunas_derivadas,
+    criar_card_metrica, criar_card_percentual, criar_card_comentario, criar_grade_cards,
+    gerar_csv
 )
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -28,16 +44,34 @@ from utils import (
 st.set_page_config(**PAGE_CONFIG)
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
+# Template Plotly do dashboard, combinado ao tema do Streamlit: os gráficos
+# só definem o que é específico (altura, títulos, range)
+pio.templates['gobrax'] = go.layout.Template(layout=dict(
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+    font=dict(color=COLORS['text']),
+    # Separadores pt-BR (decimal com vírgula, milhar com ponto), como formatar_numero
+    separators=',.',
+    xaxis=dict(gridcolor=COLORS['card_border']),
+    yaxis=dict(gridcolor=COLORS['card_border'])
+))
+pio.templates.default = 'streamlit+gobrax'
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # FUNÇÕES DE CONEXÃO E CACHE
 # ═══════════════════════════════════════════════════════════════════════════════
 
 @st.cache_resource
-def get_bigquery_client():
+def get_credenciais_gcp():
     """
-    Cria e retorna cliente do BigQuery (cached).
+    Localiza as credenciais da conta de serviço (cached), compartilhadas pelos
+    clientes do BigQuery e da BigQuery Storage API.
     Suporta execução local e no Streamlit Cloud.
+
+    Returns:
+        tuple: (credentials, project_id) — (None, None) para usar as
+        credenciais padrão do ambiente
     """
     from google.oauth2 import service_account
     import json
@@ -48,8 +82,7 @@ def get_bigquery_client():
             credentials = service_account.Credentials.from_service_account_info(
                 st.secrets["gcp_service_account"]
             )
-            client = bigquery.Client(credentials=credentials)
-            return client
+            return credentials, None
     except Exception:
         # Se falhar ao acessar secrets, continuar para tentar arquivo local
         pass
@@ -72,15 +105,24 @@ def get_bigquery_client():
                     creds_data = json.load(f)
                     project_id = creds_data.get('project_id')
 
-                client = bigquery.Client(credentials=credentials, project=project_id)
-                return client
+                return credentials, project_id
             except Exception as e:
                 st.warning(f"⚠️ Falha ao usar {caminho}: {str(e)}")
                 continue
 
-    # Se não encontrou arquivo, tentar credenciais padrão do ambiente
+    # Se não encontrou arquivo, usar credenciais padrão do ambiente
+    return None, None
+
+
+@st.cache_resource
+def get_bigquery_client():
+    """
+    Cria e retorna cliente do BigQuery (cached).
+    """
+    credentials, project_id = get_credenciais_gcp()
+
     try:
-        client = bigquery.Client()
+        client = bigquery.Client(credentials=credentials, project=project_id)
         return client
     except Exception as e:
         st.error(f"❌ Erro ao conectar ao BigQuery: {str(e)}")
@@ -111,16 +153,131 @@ Arquivo credentials.json existe? {os.path.exists('credentials.json')}
         """)
         st.stop()
 
+
+@st.cache_resource
+def get_bigquery_storage_client():
+    """
+    Cria e retorna cliente da BigQuery Storage API (cached), com as mesmas
+    credenciais do cliente BigQuery. Os resultados são baixados em lotes
+    Arrow via gRPC em vez da paginação JSON da API REST.
+    """
+    credentials, _ = get_credenciais_gcp()
+    return bigquery_storage.BigQueryReadClient(credentials=credentials)
+
+
+def ler_cache_disco(caminho: str):
+    """
+    Lê o snapshot em disco se ele existir e ainda estiver dentro do CACHE_TTL.
+    Retorna (DataFrame, instante da gravação) ou None quando não há snapshot
+    válido; o instante permite descontar a idade do snapshot do TTL do cache
+    em memória (ver carregar_dentro_do_ttl).
+    """
+    try:
+        gravado_em = os.path.getmtime(caminho)
+        if time.time() - gravado_em > CACHE_TTL:
+            return None
+        return pd.read_parquet(caminho), gravado_em
+    except Exception:
+        return None
+
+
+def salvar_cache_disco(df: pd.DataFrame, caminho: str):
+    """
+    Grava o snapshot em disco (falhas de escrita são ignoradas: o cache em
+    memória continua funcionando).
+    """
+    temporario = None
+    try:
+        pasta = os.path.dirname(caminho)
+        os.makedirs(pasta, exist_ok=True)
+        # Nome temporário único por escrita: sessões gravando ao mesmo tempo não
+        # sobrescrevem o arquivo uma da outra antes do os.replace
+        with tempfile.NamedTemporaryFile(dir=pasta, suffix='.tmp', delete=False) as arquivo:
+            temporario = arquivo.name
+        df.to_parquet(temporario, index=False, compression='zstd')
+        os.replace(temporario, caminho)
+    except Exception:
+        if temporario is not None:
+            with contextlib.suppress(OSError):
+                os.remove(temporario)
+
+
 @st.cache_data(ttl=CACHE_TTL)
-def carregar_dados():
+def carregar_opcoes_filtros() -> dict:
+    """
+    Carrega os valores distintos das colunas filtráveis (opções da sidebar)
+    com cache de 1 hora.
+    """
+    try:
+        client = get_bigquery_client()
+
+        with st.spinner("🔍 Carregando opções de filtro..."):
+            linha = next(iter(client.query(QUERY_OPCOES_FILTROS).result()))
+
+        return {coluna: list(valores or []) for coluna, valores in linha.items()}
+
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar opções de filtro: {str(e)}")
+        st.stop()
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=32)
+def carregar_dados(tipos=None, frotas=None, tempos=None, classificacoes=None,
+                   responsaveis=None, lifecycles=None):
     """
     Carrega dados do BigQuery com cache de 1 hora.
+    Os filtros da sidebar são aplicados na própria query como parâmetros
+    (listas vazias ou None não filtram; TODAS_OPCOES exclui só os nulos), e o
+    cache é mantido por combinação de filtros (no máximo 32, como as seções,
+    para limitar a memória). A visão padrão (todas as opções
+    selecionadas) também é gravada em disco (Parquet) para que o primeiro
+    acesso após um reinício não precise consultar o BigQuery.
+
+    Returns:
+        tuple: (DataFrame, versão) — a versão é o instante da carga (ou da
+        gravação do snapshot em disco) e entra na chave de cache das seções,
+        que não hasheiam o DataFrame
     """
+    filtros = {
+        "tipos": tipos,
+        "frotas": frotas,
+        "tempos": tempos,
+        "classificacoes": classificacoes,
+        "responsaveis": responsaveis,
+        "lifecycles": lifecycles
+    }
+
+    query = QUERY_MAIN
+    parametros = []
+    for parametro, valores in filtros.items():
+        if valores == TODAS_OPCOES:
+            query += f"  AND {FILTROS_TODAS_OPCOES[parametro]}\n"
+        elif valores:
+            query += f"  AND {FILTROS_QUERY[parametro]} IN UNNEST(@{parametro})\n"
+            parametros.append(bigquery.ArrayQueryParameter(parametro, "STRING", list(valores)))
+
+    # Visão padrão (carga inicial), reaproveitar o snapshot em disco entre reinícios
+    visao_padrao = all(valores == TODAS_OPCOES for valores in filtros.values())
+    if visao_padrao:
+        snapshot = ler_cache_disco(CACHE_DISCO_ARQUIVO)
+        # Snapshot de esquema antigo ou inválido é descartado e a query roda
+        if snapshot is not None and validar_dados(snapshot[0])[0]:
+            df, gravado_em = snapshot
+            return adicionar_colunas_derivadas(otimizar_tipos(df)), gravado_em
+
+    job_config = bigquery.QueryJobConfig(query_parameters=parametros)
+
     try:
         client = get_bigquery_client()
 
         with st.spinner("📊 Carregando dados do BigQuery..."):
-            df = client.query(QUERY_MAIN).to_dataframe()
+            df = client.query(query, job_config=job_config).to_dataframe(
+                bqstorage_client=get_bigquery_storage_client()
+            )
+
+        # Com filtros ativos, um resultado vazio é válido (tratado em main)
+        if df.empty and not visao_padrao:
+            return df, time.time()
 
         # Validar dados
         valido, mensagem = validar_dados(df)
@@ -128,81 +285,225 @@ def carregar_dados():
             st.error(f"❌ Erro na validação dos dados: {mensagem}")
             st.stop()
 
-        return df
+        df = adicionar_colunas_derivadas(otimizar_tipos(df))
+        if visao_padrao:
+            salvar_cache_disco(df, CACHE_DISCO_ARQUIVO)
+        return df, time.time()
 
     except Exception as e:
         st.error(f"❌ Erro ao carregar dados: {str(e)}")
         st.stop()
 
 
-@st.cache_data(ttl=CACHE_TTL)
-def carregar_usuarios_inativos():
+def buscar_usuarios_inativos(client, bqstorage_client) -> pd.DataFrame:
     """
-    Carrega dados de usuarios inativos do BigQuery com cache de 1 hora.
+    Consulta e prepara a tabela de usuários inativos. Roda em thread de
+    trabalho: não chama st.* e propaga os erros para carregar_usuarios.
     """
-    try:
-        client = get_bigquery_client()
-
-        with st.spinner("Carregando usuarios inativos..."):
-            df = client.query(QUERY_USUARIOS_INATIVOS).to_dataframe()
+    df = client.query(QUERY_USUARIOS_INATIVOS).to_dataframe(
+        bqstorage_client=bqstorage_client
+    )
 
-        # Normalize column names from the query.
-        rename_map = {
-            "nome_usuario": "user_name",
-            "email_usuario": "email",
-            "empresa": "customer_name",
-        }
-        for src, dst in rename_map.items():
-            if dst not in df.columns and src in df.columns:
-                df = df.rename(columns={src: dst})
+    # Normalize column names from the query.
+    rename_map = {
+        "nome_usuario": "user_name",
+        "email_usuario": "email",
+        "empresa": "customer_name",
+    }
+    for src, dst in rename_map.items():
+        if dst not in df.columns and src in df.columns:
+            df = df.rename(columns={src: dst})
+
+    missing_cols = [col for col in COLUNAS_USUARIOS_INATIVOS if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"colunas ausentes em usuarios inativos: {', '.join(missing_cols)}")
 
-        required_cols = ["user_name", "email", "customer_name", "perfil", "ultima_atividade"]
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            st.error(f"Erro: colunas ausentes em usuarios inativos: {', '.join(missing_cols)}")
-            return pd.DataFrame()
+    # Converter e formatar a data uma única vez no carregamento (e não a cada rerun)
+    df['ultima_atividade'] = pd.to_datetime(df['ultima_atividade'])
+    df['ultima_atividade_formatada'] = formatar_data_serie(df['ultima_atividade'])
 
-        return df
+    # Ordenar uma única vez: mais antigos primeiro (= mais dias sem acesso)
+    df = df.sort_values('ultima_atividade', kind='stable', ignore_index=True)
 
-    except Exception as e:
-        st.error(f"Erro ao carregar usuarios inativos: {str(e)}")
-        return pd.DataFrame()
+    return otimizar_tipos(df, COLUNAS_CATEGORICAS_USUARIOS)
 
 
-@st.cache_data(ttl=CACHE_TTL)
-def carregar_usuarios_responderam():
+def buscar_usuarios_responderam(client, bqstorage_client) -> pd.DataFrame:
     """
-    Carrega dados de usuários que responderam ao NPS do BigQuery com cache de 1 hora.
+    Consulta e prepara a tabela de usuários que responderam ao NPS. Roda em
+    thread de trabalho: não chama st.* e propaga os erros para carregar_usuarios.
     """
-    try:
-        client = get_bigquery_client()
+    df = client.query(QUERY_USUARIOS_RESPONDERAM).to_dataframe(
+        bqstorage_client=bqstorage_client
+    )
 
-        with st.spinner("📝 Carregando usuários que responderam..."):
-            df = client.query(QUERY_USUARIOS_RESPONDERAM).to_dataframe()
+    # Ordenar uma única vez no carregamento: maiores notas primeiro
+    if 'score' in df.columns:
+        df = df.sort_values('score', ascending=False, kind='stable', ignore_index=True)
 
-        return df
+    return otimizar_tipos(df, COLUNAS_CATEGORICAS_USUARIOS)
 
-    except Exception as e:
-        st.error(f"❌ Erro ao carregar usuários que responderam: {str(e)}")
-        return pd.DataFrame()
+
+@st.cache_data(ttl=CACHE_TTL)
+def carregar_usuarios() -> tuple:
+    """
+    Carrega as tabelas de usuários inativos e de usuários que responderam com
+    cache de 1 hora (snapshot em disco ou BigQuery). As consultas que faltarem
+    rodam em paralelo em threads de trabalho que só fazem a busca; cache,
+    spinner e mensagens de erro ficam na thread principal.
+
+    Returns:
+        tuple: (df_inativos, df_responderam, carregado_em) — DataFrame vazio
+        quando a carga falha; carregado_em é o instante da carga mais antiga
+        (snapshot em disco ou consulta)
+    """
+    # Snapshot em disco, colunas exigidas no snapshot, busca no BigQuery e
+    # mensagem de erro de cada tabela
+    tabelas = [
+        (CACHE_DISCO_INATIVOS, COLUNAS_USUARIOS_INATIVOS + ['ultima_atividade_formatada'],
+         buscar_usuarios_inativos, "Erro ao carregar usuarios inativos"),
+        (CACHE_DISCO_RESPONDERAM, COLUNAS_USUARIOS_RESPONDERAM,
+         buscar_usuarios_responderam, "❌ Erro ao carregar usuários que responderam"),
+    ]
+
+    resultados = []
+    carregado_em = time.time()
+    for caminho, colunas, _, _ in tabelas:
+        snapshot = ler_cache_disco(caminho)
+        # Snapshot de esquema antigo (sem alguma coluna exigida) é descartado
+        if snapshot is None or not set(colunas).issubset(snapshot[0].columns):
+            resultados.append(None)
+            continue
+        df, gravado_em = snapshot
+        resultados.append(otimizar_tipos(df, COLUNAS_CATEGORICAS_USUARIOS))
+        carregado_em = min(carregado_em, gravado_em)
+
+    pendentes = [i for i, df in enumerate(resultados) if df is None]
+    if not pendentes:
+        return (*resultados, carregado_em)
+
+    client = get_bigquery_client()
+    bqstorage_client = get_bigquery_storage_client()
+
+    with st.spinner("📝 Carregando usuários..."):
+        with ThreadPoolExecutor(max_workers=len(pendentes)) as executor:
+            futuros = {
+                i: executor.submit(tabelas[i][2], client, bqstorage_client)
+                for i in pendentes
+            }
+
+    for i, futuro in futuros.items():
+        caminho, _, _, mensagem = tabelas[i]
+        try:
+            resultados[i] = futuro.result()
+        except Exception as e:
+            st.error(f"{mensagem}: {str(e)}")
+            resultados[i] = pd.DataFrame()
+            continue
+        salvar_cache_disco(resultados[i], caminho)
+
+    return (*resultados, carregado_em)
+
+
+def carregar_dentro_do_ttl(carregador, **kwargs) -> tuple:
+    """
+    Chama um carregador em cache cujo último item retornado é o instante da
+    carga. Se essa carga já passou do CACHE_TTL (o que acontece quando ela veio
+    de um snapshot em disco gravado antes), a entrada é descartada e a carga é
+    refeita: sem isso, o cache em memória serviria dados com até o dobro do TTL.
+    """
+    resultado = carregador(**kwargs)
+    if time.time() - resultado[-1] > CACHE_TTL:
+        carregador.clear(**kwargs)
+        resultado = carregador(**kwargs)
+    return resultado
 
 
 def limpar_cache():
     """
-    Limpa o cache de dados.
+    Limpa o cache de dados (memória e snapshots em disco).
     """
     st.cache_data.clear()
+    for arquivo in (CACHE_DISCO_ARQUIVO, CACHE_DISCO_INATIVOS, CACHE_DISCO_RESPONDERAM):
+        # Outra sessão pode ter removido o arquivo ao mesmo tempo
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(arquivo)
     st.success("✅ Cache limpo! Recarregando dados...")
     st.rerun()
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# FUNÇÕES DE CÁLCULO (CACHE POR FILTROS)
+# ═══════════════════════════════════════════════════════════════════════════════
+# O DataFrame filtrado é determinado pelos filtros da sidebar e pela carga de
+# carregar_dados, então a chave do cache é a tupla de filtros mais a versão da
+# carga (uma recarga após o TTL gera nova versão e não reaproveita seções da
+# carga anterior); o DataFrame vai como `_df` (prefixo `_` faz o Streamlit não
+# hashear o argumento).
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=32)
+def calcular_secao_executiva(_df: pd.DataFrame, filtros: dict, versao: float) -> dict:
+    """
+    Calcula os KPIs da Visão Executiva.
+    """
+    return calcular_resumo_executivo(_df)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=32)
+def calcular_secao_distribuicao_notas(_df: pd.DataFrame, filtros: dict, versao: float) -> pd.DataFrame:
+    """
+    Calcula a distribuição de notas (0-10).
+    """
+    return criar_distribuicao_notas(_df)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=32)
+def calcular_secao_segmentacoes(_df: pd.DataFrame, filtros: dict, versao: float) -> dict:
+    """
+    Calcula o NPS por Tipo de Cliente, Faixa de Frota e Tempo de Casa.
+    """
+    return calcular_nps_por_segmentos(_df, ['tipo_cliente', 'faixa_frota', 'faixa_tempo_casa'])
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=32)
+def calcular_secao_heatmap(_df: pd.DataFrame, filtros: dict, versao: float) -> pd.DataFrame:
+    """
+    Calcula a matriz do mapa de calor (Frota × Tempo de Casa).
+    """
+    return criar_heatmap_data(_df)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=32)
+def calcular_secao_detratores(_df: pd.DataFrame, filtros: dict, versao: float) -> tuple:
+    """
+    Calcula os detratores prioritários e os comentários por classificação.
+    """
+    return filtrar_detratores_prioritarios(_df), processar_comentarios_por_classificacao(_df)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # FUNÇÕES DE INTERFACE - SIDEBAR
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def renderizar_sidebar(df: pd.DataFrame) -> pd.DataFrame:
+def normalizar_selecao(selecionados: list, disponiveis: list) -> tuple:
     """
-    Renderiza sidebar com filtros e retorna DataFrame filtrado.
+    Converte a seleção de um filtro em tupla para a query. Nenhuma opção
+    selecionada não filtra (tupla vazia). Todas as opções selecionadas viram
+    TODAS_OPCOES: a query só exclui os nulos, como o isin com a lista completa,
+    e a visão padrão compartilha o mesmo cache (e o snapshot em disco)
+    independentemente da ordem das opções.
+    """
+    if not selecionados:
+        return ()
+    if set(selecionados) == set(disponiveis):
+        return TODAS_OPCOES
+    return tuple(selecionados)
+
+
+def renderizar_sidebar(opcoes: dict) -> dict:
+    """
+    Renderiza sidebar com filtros e retorna os valores selecionados
+    (argumentos de carregar_dados).
     """
     with st.sidebar:
         st.markdown("# 📊 Dashboard NPS")
@@ -212,7 +513,7 @@ def renderizar_sidebar(df: pd.DataFrame) -> pd.DataFrame:
         st.markdown("### 🔍 Filtros")
 
         # Filtro: Tipo de Cliente
-        tipos_disponiveis = sorted(df['tipo_cliente'].dropna().unique().tolist())
+        tipos_disponiveis = opcoes.get('tipo_cliente', [])
         tipos_selecionados = st.multiselect(
             "Tipo de Cliente",
             options=tipos_disponiveis,
@@ -221,7 +522,7 @@ def renderizar_sidebar(df: pd.DataFrame) -> pd.DataFrame:
         )
 
         # Filtro: Faixa de Frota
-        frotas_disponiveis = sorted(df['faixa_frota'].dropna().unique().tolist())
+        frotas_disponiveis = opcoes.get('faixa_frota', [])
         frotas_selecionadas = st.multiselect(
             "Faixa de Frota",
             options=frotas_disponiveis,
@@ -230,7 +531,7 @@ def renderizar_sidebar(df: pd.DataFrame) -> pd.DataFrame:
         )
 
         # Filtro: Faixa de Tempo de Casa
-        tempos_disponiveis = sorted(df['faixa_tempo_casa'].dropna().unique().tolist())
+        tempos_disponiveis = opcoes.get('faixa_tempo_casa', [])
         tempos_selecionados = st.multiselect(
             "Tempo de Casa",
             options=tempos_disponiveis,
@@ -248,32 +549,26 @@ def renderizar_sidebar(df: pd.DataFrame) -> pd.DataFrame:
         )
 
         # Filtro: Responsável CS (se disponível)
-        if 'responsavel_cs' in df.columns:
-            responsaveis_disponiveis = sorted(df['responsavel_cs'].dropna().unique().tolist())
-            if responsaveis_disponiveis:
-                responsaveis_selecionados = st.multiselect(
-                    "Responsável CS",
-                    options=responsaveis_disponiveis,
-                    default=responsaveis_disponiveis,
-                    key="filtro_responsavel"
-                )
-            else:
-                responsaveis_selecionados = []
+        responsaveis_disponiveis = opcoes.get('responsavel_cs', [])
+        if responsaveis_disponiveis:
+            responsaveis_selecionados = st.multiselect(
+                "Responsável CS",
+                options=responsaveis_disponiveis,
+                default=responsaveis_disponiveis,
+                key="filtro_responsavel"
+            )
         else:
             responsaveis_selecionados = []
 
-        # Filtro: Lifecycle Stage
-        if 'lifecyclestage_descricao' in df.columns:
-            lifecycles_disponiveis = sorted(df['lifecyclestage_descricao'].dropna().unique().tolist())
-            if lifecycles_disponiveis:
-                lifecycles_selecionados = st.multiselect(
-                    "Lifecycle Stage",
-                    options=lifecycles_disponiveis,
-                    default=lifecycles_disponiveis,
-                    key="filtro_lifecycle"
-                )
-            else:
-                lifecycles_selecionados = lifecycles_disponiveis
+        # Filtro: Lifecycle Stage (se disponível)
+        lifecycles_disponiveis = opcoes.get('lifecyclestage_descricao', [])
+        if lifecycles_disponiveis:
+            lifecycles_selecionados = st.multiselect(
+                "Lifecycle Stage",
+                options=lifecycles_disponiveis,
+                default=lifecycles_disponiveis,
+                key="filtro_lifecycle"
+            )
         else:
             lifecycles_selecionados = []
 
@@ -282,11 +577,11 @@ def renderizar_sidebar(df: pd.DataFrame) -> pd.DataFrame:
         # Botões de ação
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("🔄 Refresh", use_container_width=True):
+            if st.button("🔄 Refresh", width="stretch"):
                 limpar_cache()
 
         with col2:
-            if st.button("🗑️ Limpar", use_container_width=True):
+            if st.button("🗑️ Limpar", width="stretch"):
                 st.session_state.clear()
                 st.rerun()
 
@@ -294,28 +589,15 @@ def renderizar_sidebar(df: pd.DataFrame) -> pd.DataFrame:
         st.markdown(f"**Última atualização:**")
         st.markdown(f"_{datetime.now().strftime('%d/%m/%Y %H:%M')}_")
 
-    # Aplicar filtros
-    df_filtrado = df.copy()
-
-    if tipos_selecionados:
-        df_filtrado = df_filtrado[df_filtrado['tipo_cliente'].isin(tipos_selecionados)]
-
-    if frotas_selecionadas:
-        df_filtrado = df_filtrado[df_filtrado['faixa_frota'].isin(frotas_selecionadas)]
-
-    if tempos_selecionados:
-        df_filtrado = df_filtrado[df_filtrado['faixa_tempo_casa'].isin(tempos_selecionados)]
-
-    if classificacoes_selecionadas:
-        df_filtrado = df_filtrado[df_filtrado['classificacao_empresa'].isin(classificacoes_selecionadas)]
-
-    if responsaveis_selecionados and 'responsavel_cs' in df.columns:
-        df_filtrado = df_filtrado[df_filtrado['responsavel_cs'].isin(responsaveis_selecionados)]
-
-    if lifecycles_selecionados and 'lifecyclestage_descricao' in df.columns:
-        df_filtrado = df_filtrado[df_filtrado['lifecyclestage_descricao'].isin(lifecycles_selecionados)]
-
-    return df_filtrado
+    # Filtros aplicados no BigQuery por carregar_dados (tuplas para a chave do cache)
+    return {
+        "tipos": normalizar_selecao(tipos_selecionados, tipos_disponiveis),
+        "frotas": normalizar_selecao(frotas_selecionadas, frotas_disponiveis),
+        "tempos": normalizar_selecao(tempos_selecionados, tempos_disponiveis),
+        "classificacoes": normalizar_selecao(classificacoes_selecionadas, classificacoes),
+        "responsaveis": normalizar_selecao(responsaveis_selecionados, responsaveis_disponiveis),
+        "lifecycles": normalizar_selecao(lifecycles_selecionados, lifecycles_disponiveis)
+    }
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -337,112 +619,67 @@ def renderizar_header():
     st.markdown("---")
 
 
-def renderizar_visao_executiva(df: pd.DataFrame):
+def renderizar_visao_executiva(df: pd.DataFrame, filtros: dict, versao: float):
     """
     Renderiza seção de Visão Executiva com KPIs principais.
     """
     st.markdown("## 💎 Visão Executiva")
 
-    # Calcular métricas
-    nps_geral = calcular_nps(df)
-    nps_ponderado = calcular_nps_ponderado(df)
-    total_empresas = len(df)
-    total_respostas = df['qtd_respostas'].sum()
-    total_frota = df['qtd_frota'].sum()
+    # Calcular métricas (cache por filtros e versão da carga)
+    metricas = calcular_secao_executiva(df, filtros, versao)
+    nps_geral = metricas['nps_geral']
+    nps_ponderado = metricas['nps_ponderado']
+    total_empresas = metricas['total_empresas']
+    total_respostas = metricas['total_respostas']
+    total_frota = metricas['total_frota']
 
     # Frota em risco (detratores)
-    frota_risco = df[df['classificacao_empresa'] == 'Detrator']['qtd_frota'].sum()
-
-    # KPIs em 4 colunas
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        cor_nps = get_cor_nps(nps_geral)
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {cor_nps};'>
-                <div class='metric-label'>NPS GERAL</div>
-                <div class='metric-value' style='color: {cor_nps};'>{nps_geral:.1f}</div>
-                <div class='metric-subtitle'>% Promotores - % Detratores</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {COLORS['promotor']};'>
-                <div class='metric-label'>NPS PONDERADO</div>
-                <div class='metric-value' style='color: {COLORS['promotor']};'>{nps_ponderado:.2f}</div>
-                <div class='metric-subtitle'>Ponderado por Frota</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    with col3:
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {COLORS['text']};'>
-                <div class='metric-label'>EMPRESAS</div>
-                <div class='metric-value' style='color: {COLORS['text']};'>{formatar_numero(total_empresas)}</div>
-                <div class='metric-subtitle'>{formatar_numero(total_respostas)} respostas</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    with col4:
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {COLORS['neutro']};'>
-                <div class='metric-label'>FROTA TOTAL</div>
-                <div class='metric-value' style='color: {COLORS['neutro']};'>{formatar_numero(total_frota)}</div>
-                <div class='metric-subtitle' style='color: {COLORS['detrator']};'>{formatar_numero(frota_risco)} em risco</div>
-            </div>
-        """, unsafe_allow_html=True)
+    frota_risco = metricas['frota_risco']
+
+    # KPIs em 4 colunas (um único st.markdown para a seção)
+    cor_nps = get_cor_nps(nps_geral)
+    st.markdown(criar_grade_cards([
+        criar_card_metrica("NPS GERAL", formatar_numero(nps_geral, 1), "% Promotores - % Detratores", cor_nps),
+        criar_card_metrica("NPS PONDERADO", formatar_numero(nps_ponderado, 2), "Ponderado por Frota", COLORS['promotor']),
+        criar_card_metrica(
+            "EMPRESAS", formatar_numero(total_empresas),
+            f"{formatar_numero(total_respostas)} respostas", COLORS['text']
+        ),
+        criar_card_metrica(
+            "FROTA TOTAL", formatar_numero(total_frota),
+            f"{formatar_numero(frota_risco)} em risco", COLORS['neutro'], COLORS['detrator']
+        )
+    ]), unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
     # Distribuição percentual e gráfico de pizza
-    distribuicao = calcular_distribuicao_classificacao(df)
+    distribuicao = metricas['distribuicao']
 
     # Container para centralizar os cards com o gráfico
     col_left, col_cards, col_pizza, col_right = st.columns([0.5, 3, 2, 0.5])
 
     with col_cards:
-        # Adicionar padding top para centralizar verticalmente
-        st.markdown("<div style='padding-top: 35px;'></div>", unsafe_allow_html=True)
-
-        # Cards de percentual em linha
-        cards_col1, cards_col2, cards_col3 = st.columns(3)
-
-        with cards_col1:
-            st.markdown(f"""
-                <div style='text-align: center; padding: 20px; background: rgba(16, 185, 129, 0.1); border-radius: 8px;'>
-                    <div style='font-size: 32px; font-weight: 700; color: {COLORS['promotor']};'>
-                        {distribuicao['Promotor']:.1f}%
-                    </div>
-                    <div style='font-size: 14px; color: {COLORS['text_secondary']};'>Promotores</div>
-                </div>
-            """, unsafe_allow_html=True)
-
-        with cards_col2:
-            st.markdown(f"""
-                <div style='text-align: center; padding: 20px; background: rgba(245, 158, 11, 0.1); border-radius: 8px;'>
-                    <div style='font-size: 32px; font-weight: 700; color: {COLORS['neutro']};'>
-                        {distribuicao['Neutro']:.1f}%
-                    </div>
-                    <div style='font-size: 14px; color: {COLORS['text_secondary']};'>Neutros</div>
-                </div>
-            """, unsafe_allow_html=True)
-
-        with cards_col3:
-            st.markdown(f"""
-                <div style='text-align: center; padding: 20px; background: rgba(239, 68, 68, 0.1); border-radius: 8px;'>
-                    <div style='font-size: 32px; font-weight: 700; color: {COLORS['detrator']};'>
-                        {distribuicao['Detrator']:.1f}%
-                    </div>
-                    <div style='font-size: 14px; color: {COLORS['text_secondary']};'>Detratores</div>
-                </div>
-            """, unsafe_allow_html=True)
+        # Cards de percentual em linha (padding top para centralizar verticalmente)
+        st.markdown(
+            "<div style='padding-top: 35px;'>"
+            + criar_grade_cards([
+                criar_card_percentual(distribuicao['Promotor'], "Promotores", COLORS['promotor'], "rgba(16, 185, 129, 0.1)"),
+                criar_card_percentual(distribuicao['Neutro'], "Neutros", COLORS['neutro'], "rgba(245, 158, 11, 0.1)"),
+                criar_card_percentual(distribuicao['Detrator'], "Detratores", COLORS['detrator'], "rgba(239, 68, 68, 0.1)")
+            ])
+            + "</div>",
+            unsafe_allow_html=True
+        )
 
     with col_pizza:
         # Gráfico de pizza
         fig_pizza = go.Figure(data=[go.Pie(
             labels=['Promotor', 'Neutro', 'Detrator'],
-            values=[distribuicao['Promotor'], distribuicao['Neutro'], distribuicao['Detrator']],
+            values=np.array(
+                [distribuicao['Promotor'], distribuicao['Neutro'], distribuicao['Detrator']],
+                dtype=np.float32
+            ),
             hole=0.5,
             marker=dict(colors=[COLORS['promotor'], COLORS['neutro'], COLORS['detrator']]),
             textinfo='label+percent',
@@ -453,42 +690,36 @@ def renderizar_visao_executiva(df: pd.DataFrame):
         fig_pizza.update_layout(
             showlegend=False,
             height=250,
-            margin=dict(l=20, r=20, t=20, b=20),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
+            margin=dict(l=20, r=20, t=20, b=20)
         )
 
-        st.plotly_chart(fig_pizza, use_container_width=True, config={'displayModeBar': False})
+        # Gráfico estático: rótulos já mostram tudo, sem camada de interação no navegador
+        st.plotly_chart(fig_pizza, width="stretch", config={'displayModeBar': False, 'staticPlot': True})
 
 
-def renderizar_distribuicao_notas(df: pd.DataFrame):
+def renderizar_distribuicao_notas(df: pd.DataFrame, filtros: dict, versao: float):
     """
     Renderiza gráfico de distribuição de notas.
     """
     st.markdown("## 📊 Distribuição de Notas")
 
-    df_notas = criar_distribuicao_notas(df)
+    df_notas = calcular_secao_distribuicao_notas(df, filtros, versao)
 
     # Cores por faixa
-    cores = []
-    for nota in df_notas['nota']:
-        if nota >= 9:
-            cores.append(COLORS['promotor'])
-        elif nota >= 7:
-            cores.append(COLORS['neutro'])
-        else:
-            cores.append(COLORS['detrator'])
+    cores = get_cores_nota(df_notas['nota'])
 
     fig = go.Figure()
 
     # Barras
+    # Arrays numpy tipados seguem em base64 para o navegador (Plotly >= 6)
+    quantidades = df_notas['quantidade'].to_numpy(dtype=np.int32)
+
     fig.add_trace(go.Bar(
-        x=df_notas['nota'],
-        y=df_notas['quantidade'],
+        x=df_notas['nota'].to_numpy(dtype=np.int8),
+        y=quantidades,
         marker=dict(color=cores),
-        text=df_notas['quantidade'],
-        textposition='outside',
-        hovertemplate='<b>Nota %{x}</b><br>Quantidade: %{y}<extra></extra>'
+        text=quantidades,
+        textposition='outside'
     ))
 
     # Linhas verticais nos limites
@@ -507,54 +738,66 @@ def renderizar_distribuicao_notas(df: pd.DataFrame):
         xaxis=dict(
             tickmode='linear',
             tick0=0,
-            dtick=1,
-            gridcolor=COLORS['card_border']
+            dtick=1
         ),
-        yaxis=dict(gridcolor=COLORS['card_border'], range=y_range),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color=COLORS['text']),
+        yaxis=dict(range=y_range),
         height=400,
         showlegend=False
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    # Gráfico estático: as quantidades já aparecem como rótulos das barras
+    st.plotly_chart(fig, width="stretch", config={'staticPlot': True})
+
+
+def criar_barras_nps(df_segmento: pd.DataFrame, horizontal: bool = True) -> go.Figure:
+    """
+    Cria o gráfico de barras de NPS por segmento (cores por faixa de NPS,
+    rótulo com o NPS e quantidade de empresas no hover). O layout comum vem
+    do template 'gobrax'; cada seção só ajusta títulos, altura e range.
+
+    Args:
+        df_segmento: DataFrame com colunas segmento, nps e quantidade
+        horizontal: Barras horizontais (segmento no eixo Y)
+
+    Returns:
+        Figura Plotly
+    """
+    nps = df_segmento['nps'].to_numpy(dtype=np.float32)
+    eixo_nps, eixo_segmento = ('x', 'y') if horizontal else ('y', 'x')
+
+    fig = go.Figure()
+    fig.add_bar(
+        **{eixo_nps: nps, eixo_segmento: df_segmento['segmento']},
+        orientation='h' if horizontal else 'v',
+        marker_color=get_cores_nps(nps),
+        texttemplate=f'%{{{eixo_nps}:.1f}}',
+        textposition='outside',
+        hovertemplate=(
+            f'<b>%{{{eixo_segmento}}}</b><br>NPS: %{{{eixo_nps}:.1f}}'
+            '<br>Empresas: %{customdata}<extra></extra>'
+        ),
+        customdata=df_segmento['quantidade'].to_numpy(dtype=np.int32)
+    )
+    return fig
 
 
-def renderizar_segmentacoes(df: pd.DataFrame):
+def renderizar_segmentacoes(df: pd.DataFrame, filtros: dict, versao: float):
     """
     Renderiza gráficos de segmentação (Tipo, Frota, Tempo, Lifecycle).
     """
     st.markdown("## 🎯 Segmentações")
 
+    segmentos = calcular_secao_segmentacoes(df, filtros, versao)
+
     # Gráfico 1: Tipo de Cliente
     st.markdown("### NPS por Tipo de Cliente")
-    df_tipo = calcular_nps_por_segmento(df, 'tipo_cliente')
+    df_tipo = segmentos['tipo_cliente']
 
     if not df_tipo.empty:
-        fig = go.Figure(go.Bar(
-            x=df_tipo['nps'],
-            y=df_tipo['segmento'],
-            orientation='h',
-            marker=dict(color=df_tipo['nps'].apply(get_cor_nps)),
-            text=df_tipo['nps'].apply(lambda x: f"{x:.1f}"),
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>NPS: %{x:.1f}<br>Empresas: %{customdata}<extra></extra>',
-            customdata=df_tipo['quantidade']
-        ))
+        fig = criar_barras_nps(df_tipo)
+        fig.update_layout(xaxis_title="NPS", yaxis_title="", height=300)
 
-        fig.update_layout(
-            xaxis_title="NPS",
-            yaxis_title="",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color=COLORS['text']),
-            height=300,
-            xaxis=dict(gridcolor=COLORS['card_border']),
-            yaxis=dict(gridcolor=COLORS['card_border'])
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, width="stretch")
     else:
         st.info("Sem dados disponíveis")
 
@@ -562,35 +805,16 @@ def renderizar_segmentacoes(df: pd.DataFrame):
 
     # Gráfico 2: Faixa de Frota
     st.markdown("### NPS por Faixa de Frota")
-    df_frota = calcular_nps_por_segmento(df, 'faixa_frota')
+    df_frota = segmentos['faixa_frota']
 
     if not df_frota.empty:
         # Ordenar alfabeticamente
         df_frota = df_frota.sort_values('segmento')
 
-        fig = go.Figure(go.Bar(
-            x=df_frota['nps'],
-            y=df_frota['segmento'],
-            orientation='h',
-            marker=dict(color=df_frota['nps'].apply(get_cor_nps)),
-            text=df_frota['nps'].apply(lambda x: f"{x:.1f}"),
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>NPS: %{x:.1f}<br>Empresas: %{customdata}<extra></extra>',
-            customdata=df_frota['quantidade']
-        ))
-
-        fig.update_layout(
-            xaxis_title="NPS",
-            yaxis_title="",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color=COLORS['text']),
-            height=300,
-            xaxis=dict(gridcolor=COLORS['card_border']),
-            yaxis=dict(gridcolor=COLORS['card_border'])
-        )
+        fig = criar_barras_nps(df_frota)
+        fig.update_layout(xaxis_title="NPS", yaxis_title="", height=300)
 
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, width="stretch")
     else:
         st.info("Sem dados disponíveis")
 
@@ -598,21 +822,13 @@ def renderizar_segmentacoes(df: pd.DataFrame):
 
     # Gráfico 3: Tempo de Casa
     st.markdown("### NPS por Tempo de Casa")
-    df_tempo = calcular_nps_por_segmento(df, 'faixa_tempo_casa')
+    df_tempo = segmentos['faixa_tempo_casa']
 
     if not df_tempo.empty:
         # Ordenar alfabeticamente
         df_tempo = df_tempo.sort_values('segmento')
 
-        fig = go.Figure(go.Bar(
-            x=df_tempo['segmento'],
-            y=df_tempo['nps'],
-            marker=dict(color=df_tempo['nps'].apply(get_cor_nps)),
-            text=df_tempo['nps'].apply(lambda x: f"{x:.1f}"),
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>NPS: %{y:.1f}<br>Empresas: %{customdata}<extra></extra>',
-            customdata=df_tempo['quantidade']
-        ))
+        fig = criar_barras_nps(df_tempo, horizontal=False)
 
         # Calcular range do eixo Y com margem de 15% para os rótulos
         max_nps = df_tempo['nps'].max()
@@ -623,32 +839,29 @@ def renderizar_segmentacoes(df: pd.DataFrame):
         fig.update_layout(
             xaxis_title="Tempo de Casa",
             yaxis_title="NPS",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color=COLORS['text']),
             height=400,
-            xaxis=dict(gridcolor=COLORS['card_border'], tickangle=-45),
-            yaxis=dict(gridcolor=COLORS['card_border'], range=y_range)
+            xaxis=dict(tickangle=-45),
+            yaxis=dict(range=y_range)
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, width="stretch")
     else:
         st.info("Sem dados disponíveis")
 
     st.markdown("<br>", unsafe_allow_html=True)
 
 
-def renderizar_heatmap(df: pd.DataFrame):
+def renderizar_heatmap(df: pd.DataFrame, filtros: dict, versao: float):
     """
     Renderiza mapa de calor (Tempo × Frota).
     """
     st.markdown("## 🔥 Mapa de Calor: NPS por Porte × Tempo de Relacionamento")
 
-    matriz = criar_heatmap_data(df)
+    matriz = calcular_secao_heatmap(df, filtros, versao)
 
     if not matriz.empty:
         fig = go.Figure(data=go.Heatmap(
-            z=matriz.values,
+            z=matriz.to_numpy(dtype=np.float32),
             x=matriz.columns,
             y=matriz.index,
             colorscale=[
@@ -656,84 +869,113 @@ def renderizar_heatmap(df: pd.DataFrame):
                 [0.5, COLORS['heatmap_mid']],
                 [1, COLORS['promotor']]
             ],
-            text=matriz.values.round(2),
-            texttemplate='%{text}',
+            texttemplate='%{z:.2f}',
             textfont={"size": 14, "color": "black"},
-            hovertemplate='Frota: %{y}<br>Tempo: %{x}<br>NPS: %{z:.2f}<extra></extra>',
             colorbar=dict(title="NPS Médio")
         ))
 
         fig.update_layout(
             xaxis_title="Tempo de Casa",
             yaxis_title="Faixa de Frota",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color=COLORS['text']),
             height=500
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        # Gráfico estático (sem hover): o NPS de cada célula já aparece como
+        # texto e os eixos identificam frota e tempo
+        st.plotly_chart(fig, width="stretch", config={'staticPlot': True})
     else:
         st.info("Dados insuficientes para criar o heatmap")
 
 
+def formatar_tabela_clientes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Formata as colunas da tabela de clientes para exibição/exportação.
+
+    Args:
+        df: DataFrame de clientes (já ordenado)
+
+    Returns:
+        DataFrame apenas com as colunas formatadas
+    """
+    return pd.DataFrame({
+        'Razão Social': df['customer_name'],
+        'Tipo': df['tipo_cliente'],
+        'Frota': formatar_numero_serie(df['qtd_frota']),
+        'Tempo (meses)': formatar_numero_serie(df['tempo_casa_meses']),
+        'NPS': formatar_numero_serie(df['nota_media_empresa'], 1),
+        'Classificação': adicionar_emoji_serie(df['classificacao_empresa'], CLASSIFICACAO_EMOJI),
+        'Respostas': formatar_numero_serie(df['qtd_respostas']),
+        'Responsável CS': df['responsavel_cs'].astype(object).fillna('-'),
+        'Lifecycle': df['lifecyclestage_descricao'].astype(object).fillna('-'),
+        'Última Resposta': formatar_data_serie(df['ultima_resposta']),
+        'Comentários': truncar_texto_serie(df['comentarios_consolidados'], 100)
+    })
+
+
+def selecionar_pagina(df: pd.DataFrame, tamanho_pagina: int, chave: str) -> pd.DataFrame:
+    """
+    Renderiza o seletor de página e retorna apenas as linhas da página atual
+    (só elas são formatadas e enviadas ao navegador).
+
+    Args:
+        df: DataFrame completo, já ordenado
+        tamanho_pagina: Linhas por página
+        chave: Chave única do widget de página
+
+    Returns:
+        DataFrame com as linhas da página selecionada
+    """
+    total_paginas = max(1, math.ceil(len(df) / tamanho_pagina))
+    pagina = st.number_input(
+        f"Página (de {total_paginas})",
+        min_value=1,
+        max_value=total_paginas,
+        value=1,
+        step=1,
+        key=chave
+    )
+    inicio = (pagina - 1) * tamanho_pagina
+    return df.iloc[inicio:inicio + tamanho_pagina]
+
+
+@st.fragment
 def renderizar_tabela_clientes(df: pd.DataFrame):
     """
-    Renderiza tabela interativa com todos os clientes.
+    Renderiza tabela interativa com todos os clientes (paginada).
+    Fragmento: trocar de página reexecuta apenas esta seção.
     """
     st.markdown("## 📋 Tabela de Clientes")
 
-    # Preparar dados para exibição
-    df_display = df.copy()
-
-    # Formatar colunas
-    df_display['Razão Social'] = df_display['customer_name']
-    df_display['Tipo'] = df_display['tipo_cliente']
-    df_display['Frota'] = df_display['qtd_frota'].apply(lambda x: formatar_numero(x))
-    df_display['Tempo (meses)'] = df_display['tempo_casa_meses'].apply(lambda x: formatar_numero(x))
-    df_display['NPS'] = df_display['nota_media_empresa'].apply(lambda x: formatar_numero(x, 1))
-    df_display['Classificação'] = df_display['classificacao_empresa'].apply(adicionar_emoji_classificacao)
-    df_display['Respostas'] = df_display['qtd_respostas'].apply(lambda x: formatar_numero(x))
-    df_display['Responsável CS'] = df_display['responsavel_cs'].fillna('-')
-    df_display['Lifecycle'] = df_display['lifecyclestage_descricao'].fillna('-')
-    df_display['Última Resposta'] = df_display['ultima_resposta'].apply(formatar_data)
-    df_display['Comentários'] = df_display['comentarios_consolidados'].apply(lambda x: truncar_texto(x, 100))
-
-    # Selecionar colunas para exibição
-    colunas_exibir = [
-        'Razão Social', 'Tipo', 'Frota', 'Tempo (meses)', 'NPS',
-        'Classificação', 'Respostas', 'Responsável CS', 'Lifecycle',
-        'Última Resposta', 'Comentários'
-    ]
-
-    df_display = df_display[colunas_exibir]
+    # Ordenar antes de formatar: Detratores primeiro (ordem da categoria), depois por frota
+    df_ordenado = df.sort_values(['classificacao_empresa', 'qtd_frota'], ascending=[True, False])
 
-    # Ordenar: Detratores primeiro, depois por frota
-    ordem_classif = {'Detrator': 1, 'Neutro': 2, 'Promotor': 3}
-    df_display['_ordem'] = df_display['Classificação'].map(ordem_classif)
-    df_display = df_display.sort_values(['_ordem', 'Frota'], ascending=[True, False])
-    df_display = df_display.drop('_ordem', axis=1)
+    # Paginação: apenas as linhas da página atual são formatadas e enviadas ao navegador
+    df_pagina = selecionar_pagina(df_ordenado, TAMANHO_PAGINA_CLIENTES, 'pagina_clientes')
 
     # Exibir tabela
     st.dataframe(
-        df_display,
-        use_container_width=True,
-        height=600
+        formatar_tabela_clientes(df_pagina),
+        width="stretch",
+        hide_index=True
+    )
+    st.caption(
+        f"Exibindo {formatar_numero(len(df_pagina))} de {formatar_numero(len(df_ordenado))} clientes"
     )
 
-    # Botão de download CSV
-    csv = df_display.to_csv(index=False, encoding='utf-8-sig')
+    # Botão de download CSV com todos os clientes (gerado apenas quando o usuário clica)
     st.download_button(
         label="📥 Download CSV",
-        data=csv,
+        data=lambda: gerar_csv(formatar_tabela_clientes(df_ordenado)),
         file_name=f"nps_clientes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv"
     )
 
 
+@st.fragment
 def renderizar_usuarios_inativos(df_inativos: pd.DataFrame):
     """
     Renderiza seção de usuários que acessaram a plataforma mas não responderam ao NPS.
+    Fragmento: interações na seção não reexecutam o dashboard inteiro.
     """
     st.markdown("## 📋 Usuários Inativos no NPS")
 
@@ -742,7 +984,13 @@ def renderizar_usuarios_inativos(df_inativos: pd.DataFrame):
         return
 
     # Calcular dias desde último acesso
-    df_inativos['dias_sem_acesso'] = (pd.to_datetime('today') - pd.to_datetime(df_inativos['ultima_atividade'])).dt.days
+    hoje = np.datetime64('today', 'D')
+    ultima_atividade = df_inativos['ultima_atividade'].to_numpy(dtype='datetime64[D]')
+    dias_sem_acesso = (hoje - ultima_atividade) / np.timedelta64(1, 'D')
+    # Inteiro quando não há datas vazias (NaN exige float, como em .dt.days)
+    if not np.isnan(dias_sem_acesso).any():
+        dias_sem_acesso = dias_sem_acesso.astype(np.int32)
+    df_inativos['dias_sem_acesso'] = dias_sem_acesso
 
     # Calcular métricas
     total_inativos = len(df_inativos)
@@ -750,114 +998,90 @@ def renderizar_usuarios_inativos(df_inativos: pd.DataFrame):
     media_dias = df_inativos['dias_sem_acesso'].mean()
 
     # Exibir cards de métricas
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {COLORS['detrator']};'>
-                <div class='metric-label'>USUÁRIOS INATIVOS</div>
-                <div class='metric-value' style='color: {COLORS['detrator']};'>{formatar_numero(total_inativos)}</div>
-                <div class='metric-subtitle'>Não responderam ao NPS</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {COLORS['neutro']};'>
-                <div class='metric-label'>EMPRESAS ÚNICAS</div>
-                <div class='metric-value' style='color: {COLORS['neutro']};'>{formatar_numero(total_empresas)}</div>
-                <div class='metric-subtitle'>Com usuários inativos</div>
-            </div>
-        """, unsafe_allow_html=True)
+    st.markdown(criar_grade_cards([
+        criar_card_metrica(
+            "USUÁRIOS INATIVOS", formatar_numero(total_inativos),
+            "Não responderam ao NPS", COLORS['detrator']
+        ),
+        criar_card_metrica(
+            "EMPRESAS ÚNICAS", formatar_numero(total_empresas),
+            "Com usuários inativos", COLORS['neutro']
+        )
+    ]), unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
-    df_filtrado = df_inativos.copy()
-
     # Gráfico: Top 10 empresas com mais usuários inativos
     st.markdown("### 📊 Top 10 Empresas com Mais Usuários Inativos")
 
-    empresas_count = df_filtrado['customer_name'].value_counts().head(10)
+    empresas_count = contar_top_n(df_inativos['customer_name'], 10)
 
     if not empresas_count.empty:
+        # Arrays numpy tipados seguem em base64 para o navegador (Plotly >= 6)
+        quantidades = empresas_count.to_numpy(dtype=np.int32)
+
         fig = go.Figure(go.Bar(
-            x=empresas_count.values,
-            y=empresas_count.index,
+            x=quantidades,
+            y=empresas_count.index.to_numpy(dtype=object),
             orientation='h',
             marker=dict(color=COLORS['detrator']),
-            text=empresas_count.values,
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>Usuários Inativos: %{x}<extra></extra>'
+            text=quantidades,
+            textposition='outside'
         ))
 
         fig.update_layout(
             xaxis_title="Quantidade de Usuários Inativos",
             yaxis_title="",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color=COLORS['text']),
-            height=400,
-            xaxis=dict(gridcolor=COLORS['card_border']),
-            yaxis=dict(gridcolor=COLORS['card_border'])
+            height=400
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        # Gráfico estático: as quantidades já aparecem como rótulos das barras
+        st.plotly_chart(fig, width="stretch", config={'staticPlot': True})
     else:
         st.info("Sem dados disponíveis para exibir o gráfico")
 
     st.markdown("<br>", unsafe_allow_html=True)
 
-    # Tabela com cores condicionais
+    # Tabela de usuários inativos
     st.markdown("### 📋 Tabela de Usuários Inativos")
 
-    # Preparar dados para exibição
-    df_display = df_filtrado.copy()
-    df_display['Nome'] = df_display['user_name']
-    df_display['Email'] = df_display['email']
-    df_display['Empresa'] = df_display['customer_name']
-    df_display['Perfil'] = df_display['perfil']
-    df_display['Última Atividade'] = pd.to_datetime(df_display['ultima_atividade']).dt.strftime('%d/%m/%Y')
-    df_display['Dias Sem Acesso'] = df_display['dias_sem_acesso']
-
-    # Aplicar cores condicionais
-    def aplicar_cor_linha(row):
-        dias = row['Dias Sem Acesso']
-        if dias < 14:
-            return '#d4edda'  # Verde claro
-        elif dias <= 30:
-            return '#fff3cd'  # Amarelo claro
-        else:
-            return '#ffcccc'  # Vermelho claro
-
-    df_display['_cor'] = df_display.apply(aplicar_cor_linha, axis=1)
-
-    # Selecionar colunas para exibição
-    colunas_exibir = ['Nome', 'Email', 'Empresa', 'Perfil', 'Última Atividade', 'Dias Sem Acesso']
-
-    # Ordenar por dias sem acesso (decrescente)
-    df_display = df_display.sort_values('Dias Sem Acesso', ascending=False)
-
-    # Exibir tabela
+    # Preparar dados para exibição: apenas as colunas exibidas, sem copiar o DataFrame inteiro
+    # (as linhas já vêm do carregamento ordenadas por dias sem acesso, decrescente)
+    df_display = pd.DataFrame({
+        'Nome': df_inativos['user_name'],
+        'Email': df_inativos['email'],
+        'Empresa': df_inativos['customer_name'],
+        'Perfil': df_inativos['perfil'],
+        'Última Atividade': df_inativos['ultima_atividade_formatada'],
+        'Dias Sem Acesso': df_inativos['dias_sem_acesso']
+    })
+
+    # Exibir tabela (apenas a página atual)
+    df_pagina = selecionar_pagina(df_display, TAMANHO_PAGINA_USUARIOS, 'pagina_inativos')
     st.dataframe(
-        df_display[colunas_exibir],
-        use_container_width=True,
+        df_pagina,
+        width="stretch",
         height=600
     )
+    st.caption(
+        f"Exibindo {formatar_numero(len(df_pagina))} de {formatar_numero(len(df_display))} usuários"
+    )
 
-    # Botão de download CSV
-    csv = df_display[colunas_exibir].to_csv(index=False, encoding='utf-8-sig')
+    # Botão de download CSV (gerado apenas quando o usuário clica)
     st.download_button(
         label="📥 Download CSV",
-        data=csv,
+        data=lambda: gerar_csv(df_display),
         file_name=f"usuarios_inativos_nps_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv"
     )
 
 
 
+@st.fragment
 def renderizar_usuarios_responderam(df_responderam: pd.DataFrame):
     """
     Renderiza secao de usuarios que responderam ao NPS.
+    Fragmento: interacoes na secao nao reexecutam o dashboard inteiro.
     """
     st.markdown("## Usuarios que Responderam ao NPS")
 
@@ -865,8 +1089,7 @@ def renderizar_usuarios_responderam(df_responderam: pd.DataFrame):
         st.info("Nao ha usuarios com respostas no momento.")
         return
 
-    required_cols = ["user_name", "email", "customer_name", "score", "comment"]
-    missing_cols = [col for col in required_cols if col not in df_responderam.columns]
+    missing_cols = [col for col in COLUNAS_USUARIOS_RESPONDERAM if col not in df_responderam.columns]
     if missing_cols:
         st.error(f"Erro: colunas ausentes em usuarios responderam: {', '.join(missing_cols)}")
         return
@@ -875,67 +1098,75 @@ def renderizar_usuarios_responderam(df_responderam: pd.DataFrame):
     total_empresas = df_responderam["customer_name"].nunique()
     media_score = df_responderam["score"].mean()
 
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {COLORS['promotor']};'>
-                <div class='metric-label'>RESPOSTAS</div>
-                <div class='metric-value' style='color: {COLORS['promotor']};'>{formatar_numero(total_respostas)}</div>
-                <div class='metric-subtitle'>Usuarios que responderam</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {COLORS['neutro']};'>
-                <div class='metric-label'>EMPRESAS</div>
-                <div class='metric-value' style='color: {COLORS['neutro']};'>{formatar_numero(total_empresas)}</div>
-                <div class='metric-subtitle'>Empresas unicas</div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    with col3:
-        st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid {COLORS['text']};'>
-                <div class='metric-label'>MEDIA SCORE</div>
-                <div class='metric-value' style='color: {COLORS['text']};'>{formatar_numero(media_score, 1)}</div>
-                <div class='metric-subtitle'>Nota media</div>
-            </div>
-        """, unsafe_allow_html=True)
+    st.markdown(criar_grade_cards([
+        criar_card_metrica("RESPOSTAS", formatar_numero(total_respostas), "Usuarios que responderam", COLORS['promotor']),
+        criar_card_metrica("EMPRESAS", formatar_numero(total_empresas), "Empresas unicas", COLORS['neutro']),
+        criar_card_metrica("MEDIA SCORE", formatar_numero(media_score, 1), "Nota media", COLORS['text'])
+    ]), unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
-    df_display = df_responderam.copy()
-    df_display["Nome"] = df_display["user_name"]
-    df_display["Email"] = df_display["email"]
-    df_display["Empresa"] = df_display["customer_name"]
-    df_display["Score"] = df_display["score"].apply(lambda x: formatar_numero(x, 1))
-    df_display["Comentario"] = df_display["comment"].fillna("-")
-
-    colunas_exibir = ["Nome", "Email", "Empresa", "Score", "Comentario"]
+    df_display = pd.DataFrame({
+        "Nome": df_responderam["user_name"],
+        "Email": df_responderam["email"],
+        "Empresa": df_responderam["customer_name"],
+        "Score": formatar_numero_serie(df_responderam["score"], 1),
+        "Comentario": df_responderam["comment"].fillna("-")
+    })
 
+    df_pagina = selecionar_pagina(df_display, TAMANHO_PAGINA_USUARIOS, "pagina_responderam")
     st.dataframe(
-        df_display[colunas_exibir],
-        use_container_width=True,
+        df_pagina,
+        width="stretch",
         height=600
     )
+    st.caption(
+        f"Exibindo {formatar_numero(len(df_pagina))} de {formatar_numero(len(df_display))} usuarios"
+    )
 
-    csv = df_display[colunas_exibir].to_csv(index=False, encoding="utf-8-sig")
     st.download_button(
         label="Download CSV",
-        data=csv,
+        data=lambda: gerar_csv(df_display),
         file_name=f"usuarios_responderam_nps_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv"
     )
 
 
-def renderizar_detratores_risco(df: pd.DataFrame):
+@st.fragment
+def renderizar_tabela_detratores(df_detratores: pd.DataFrame):
+    """
+    Renderiza a tabela paginada de detratores prioritários.
+    Fragmento: trocar de página reexecuta apenas esta tabela.
+    """
+    # Formatar apenas a página atual, montando só as colunas exibidas
+    df_pagina = selecionar_pagina(df_detratores, TAMANHO_PAGINA_CLIENTES, 'pagina_detratores')
+    df_display = pd.DataFrame({
+        'Flag': adicionar_emoji_serie(df_pagina['flag_alerta'], FLAG_EMOJI),
+        'Empresa': df_pagina['customer_name'],
+        'NPS': formatar_numero_serie(df_pagina['nota_media_empresa'], 1),
+        'Frota Risco': formatar_numero_serie(df_pagina['qtd_frota']),
+        'Dias s/ Resposta': formatar_numero_serie(df_pagina['dias_desde_resposta']),
+        'Responsável': df_pagina['responsavel_cs'].astype(object).fillna('-'),
+        'Comentários': truncar_texto_serie(df_pagina['comentarios_consolidados'], 80)
+    })
+
+    st.dataframe(
+        df_display,
+        width="stretch",
+        height=400
+    )
+    st.caption(
+        f"Exibindo {formatar_numero(len(df_display))} de {formatar_numero(len(df_detratores))} detratores"
+    )
+
+
+def renderizar_detratores_risco(df: pd.DataFrame, filtros: dict, versao: float):
     """
     Renderiza seção de gestão de detratores em risco.
     """
     st.markdown("## ⚠️ Gestão de CS - Detratores Prioritários")
 
-    df_detratores = filtrar_detratores_prioritarios(df)
+    df_detratores, comentarios = calcular_secao_detratores(df, filtros, versao)
 
     if df_detratores.empty:
         st.success("✅ Não há detratores no momento!")
@@ -944,7 +1175,7 @@ def renderizar_detratores_risco(df: pd.DataFrame):
     # Métricas de alerta
     total_detratores = len(df_detratores)
     frota_total_risco = df_detratores['qtd_frota'].sum()
-    urgentes = len(df_detratores[df_detratores['flag_alerta'] == 'URGENTE'])
+    urgentes = int((df_detratores['flag_alerta'] == 'URGENTE').sum())
 
     st.markdown(f"""
         <div class='alert-section'>
@@ -970,79 +1201,28 @@ def renderizar_detratores_risco(df: pd.DataFrame):
         </div>
     """, unsafe_allow_html=True)
 
-    # Preparar tabela
-    df_display = df_detratores.copy()
-
-    df_display['Flag'] = df_display['flag_alerta'].apply(adicionar_emoji_flag)
-    df_display['Empresa'] = df_display['customer_name']
-    df_display['NPS'] = df_display['nota_media_empresa'].apply(lambda x: formatar_numero(x, 1))
-    df_display['Frota Risco'] = df_display['qtd_frota'].apply(lambda x: formatar_numero(x))
-    df_display['Dias s/ Resposta'] = df_display['dias_desde_resposta'].apply(lambda x: formatar_numero(x))
-    df_display['Responsável'] = df_display['responsavel_cs'].fillna('-')
-    df_display['Comentários'] = df_display['comentarios_consolidados'].apply(lambda x: truncar_texto(x, 80))
-
-    colunas_exibir = ['Flag', 'Empresa', 'NPS', 'Frota Risco', 'Dias s/ Resposta', 'Responsável', 'Comentários']
-
-    st.dataframe(
-        df_display[colunas_exibir],
-        use_container_width=True,
-        height=400
-    )
+    renderizar_tabela_detratores(df_detratores)
 
     # Comentários por classificação
     st.markdown("### 📝 Comentários por Classificação")
 
-    comentarios = processar_comentarios_por_classificacao(df)
-
-    tab1, tab2, tab3 = st.tabs(["Promotores", "Neutros", "Detratores"])
-
-    with tab1:
-        if comentarios['Promotor']:
-            for com in comentarios['Promotor']:
-                st.markdown(f"""
-                    <div style='background: rgba(16, 185, 129, 0.1); padding: 15px; border-radius: 8px;
-                                border-left: 4px solid {COLORS['promotor']}; margin-bottom: 10px;'>
-                        <div style='font-weight: 600; color: {COLORS['promotor']};'>
-                            {com['empresa']} - Nota: {com['nota']:.1f} | {com['data']}
-                        </div>
-                        <div style='margin-top: 8px; color: {COLORS['text']};'>
-                            {com['comentario']}
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.info("Nenhum comentário de promotores disponível")
-
-    with tab2:
-        if comentarios['Neutro']:
-            for com in comentarios['Neutro']:
-                st.markdown(f"""
-                    <div style='background: rgba(245, 158, 11, 0.1); padding: 15px; border-radius: 8px;
-                                border-left: 4px solid {COLORS['neutro']}; margin-bottom: 10px;'>
-                        <div style='font-weight: 600; color: {COLORS['neutro']};'>
-                            {com['empresa']} - Nota: {com['nota']:.1f} | {com['data']}
-                        <div style='margin-top: 8px; color: {COLORS['text']};'>
-                            {com['comentario']}
-                    </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.info("Nenhum comentário de neutros disponível")
+    abas = st.tabs(["Promotores", "Neutros", "Detratores"])
+    estilos_comentario = [
+        ('Promotor', 'promotores', COLORS['promotor'], "rgba(16, 185, 129, 0.1)"),
+        ('Neutro', 'neutros', COLORS['neutro'], "rgba(245, 158, 11, 0.1)"),
+        ('Detrator', 'detratores', COLORS['detrator'], "rgba(239, 68, 68, 0.1)")
+    ]
 
-    with tab3:
-        if comentarios['Detrator']:
-            for com in comentarios['Detrator']:
-                st.markdown(f"""
-                    <div style='background: rgba(239, 68, 68, 0.1); padding: 15px; border-radius: 8px;
-                                border-left: 4px solid {COLORS['detrator']}; margin-bottom: 10px;'>
-                        <div style='font-weight: 600; color: {COLORS['detrator']};'>
-                            {com['empresa']} - Nota: {com['nota']:.1f} | {com['data']}
-                        </div>
-                        <div style='margin-top: 8px; color: {COLORS['text']};'>
-                            {com['comentario']}
-                    </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.info("Nenhum comentário de detratores disponível")
+    # Um único st.markdown por aba (em vez de um por comentário)
+    for aba, (classif, nome, cor, fundo) in zip(abas, estilos_comentario):
+        with aba:
+            if comentarios[classif]:
+                st.markdown(
+                    "".join(criar_card_comentario(com, cor, fundo) for com in comentarios[classif]),
+                    unsafe_allow_html=True
+                )
+            else:
+                st.info(f"Nenhum comentário de {nome} disponível")
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1053,13 +1233,13 @@ def main():
     """
     Função principal que orquestra o dashboard.
     """
-    # Carregar dados
-    df_completo = carregar_dados()
-    df_inativos = carregar_usuarios_inativos()
-    df_responderam = carregar_usuarios_responderam()
+    opcoes_filtros = carregar_opcoes_filtros()
+
+    # Renderizar sidebar e carregar dados já filtrados no BigQuery
+    filtros = renderizar_sidebar(opcoes_filtros)
+    df_filtrado, versao = carregar_dentro_do_ttl(carregar_dados, **filtros)
 
-    # Renderizar sidebar e obter dados filtrados
-    df_filtrado = renderizar_sidebar(df_completo)
+    df_inativos, df_responderam, _ = carregar_dentro_do_ttl(carregar_usuarios)
 
     # Header
     renderizar_header()
@@ -1078,22 +1258,22 @@ def main():
 
     with tab1:
         # Seções do dashboard principal (em ordem)
-        renderizar_visao_executiva(df_filtrado)
+        renderizar_visao_executiva(df_filtrado, filtros, versao)
         st.markdown("<br><br>", unsafe_allow_html=True)
 
-        renderizar_distribuicao_notas(df_filtrado)
+        renderizar_distribuicao_notas(df_filtrado, filtros, versao)
         st.markdown("<br><br>", unsafe_allow_html=True)
 
-        renderizar_segmentacoes(df_filtrado)
+        renderizar_segmentacoes(df_filtrado, filtros, versao)
         st.markdown("<br><br>", unsafe_allow_html=True)
 
-        renderizar_heatmap(df_filtrado)
+        renderizar_heatmap(df_filtrado, filtros, versao)
         st.markdown("<br><br>", unsafe_allow_html=True)
 
         renderizar_tabela_clientes(df_filtrado)
         st.markdown("<br><br>", unsafe_allow_html=True)
 
-        renderizar_detratores_risco(df_filtrado)
+        renderizar_detratores_risco(df_filtrado, filtros, versao)
         st.markdown("<br><br>", unsafe_allow_html=True)
 
     with tab2:
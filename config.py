@@ -3,6 +3,8 @@ Configurações do Dashboard NPS - Gobrax
 Contém constantes, paleta de cores, queries e configurações gerais
 """
 
+import os
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # BIGQUERY CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -60,6 +62,7 @@ FLAG_EMOJI = {
 # QUERIES SQL
 # ═══════════════════════════════════════════════════════════════════════════════
 
+# Apenas as colunas usadas pelo dashboard
 QUERY_MAIN = f"""
 SELECT
     customer_id,
@@ -75,20 +78,50 @@ SELECT
     classificacao_empresa,
     comentarios_consolidados,
     responsavel_cs,
-    lifecyclestage,
     lifecyclestage_descricao,
-    status_do_cliente_novo_2_0,
-    perfil_cliente_hubspot,
-    frota_em_risco,
     dias_desde_resposta,
-    flag_alerta,
-    status_match_hubspot,
-    qualidade_match
+    flag_alerta
+FROM `{FULL_TABLE_PATH}`
+WHERE nota_media_empresa IS NOT NULL
+  AND DATE(ultima_resposta) <= CURRENT_DATE()
+"""
+
+# Valores distintos das colunas filtráveis (opções da sidebar)
+QUERY_OPCOES_FILTROS = f"""
+SELECT
+    ARRAY_AGG(DISTINCT tipo_cliente IGNORE NULLS ORDER BY tipo_cliente) AS tipo_cliente,
+    ARRAY_AGG(DISTINCT faixa_frota IGNORE NULLS ORDER BY faixa_frota) AS faixa_frota,
+    ARRAY_AGG(DISTINCT faixa_tempo_casa IGNORE NULLS ORDER BY faixa_tempo_casa) AS faixa_tempo_casa,
+    ARRAY_AGG(DISTINCT responsavel_cs IGNORE NULLS ORDER BY responsavel_cs) AS responsavel_cs,
+    ARRAY_AGG(DISTINCT lifecyclestage_descricao IGNORE NULLS ORDER BY lifecyclestage_descricao) AS lifecyclestage_descricao
 FROM `{FULL_TABLE_PATH}`
 WHERE nota_media_empresa IS NOT NULL
   AND DATE(ultima_resposta) <= CURRENT_DATE()
 """
 
+# Parâmetro da query -> coluna filtrada (filtros da sidebar aplicados no BigQuery)
+FILTROS_QUERY = {
+    "tipos": "tipo_cliente",
+    "frotas": "faixa_frota",
+    "tempos": "faixa_tempo_casa",
+    "classificacoes": "classificacao_empresa",
+    "responsaveis": "responsavel_cs",
+    "lifecycles": "lifecyclestage_descricao"
+}
+
+# Filtro com todas as opções selecionadas: em vez da lista completa, a query usa
+# o predicado abaixo. As opções vêm de ARRAY_AGG(... IGNORE NULLS), então
+# "todas" equivale a excluir apenas os nulos; a classificação tem opções fixas.
+TODAS_OPCOES = "*"
+FILTROS_TODAS_OPCOES = {
+    "tipos": "tipo_cliente IS NOT NULL",
+    "frotas": "faixa_frota IS NOT NULL",
+    "tempos": "faixa_tempo_casa IS NOT NULL",
+    "classificacoes": "classificacao_empresa IN ('Promotor', 'Neutro', 'Detrator')",
+    "responsaveis": "responsavel_cs IS NOT NULL",
+    "lifecycles": "lifecyclestage_descricao IS NOT NULL"
+}
+
 QUERY_USUARIOS_INATIVOS = """
 SELECT 
   nome_usuario AS user_name,
@@ -109,6 +142,50 @@ SELECT
 FROM `equipe-dados.datawarehouse_gobrax.dw_core_mgmt_nps`
 """
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# TIPOS DE DADOS (otimização de memória após o carregamento)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Colunas exigidas pelo dashboard (validadas após o carregamento)
+COLUNAS_OBRIGATORIAS = frozenset({
+    "customer_id", "customer_name", "tipo_cliente",
+    "qtd_frota", "nota_media_empresa", "classificacao_empresa"
+})
+
+# Colunas de baixa cardinalidade convertidas para 'category'
+COLUNAS_CATEGORICAS = [
+    "tipo_cliente",
+    "faixa_frota",
+    "faixa_tempo_casa",
+    "classificacao_empresa",
+    "responsavel_cs",
+    "lifecyclestage_descricao",
+    "flag_alerta"
+]
+
+# Colunas categóricas com ordem fixa (ordenação pelos códigos:
+# Detrator < Neutro < Promotor; URGENTE < ATENÇÃO < OK)
+CATEGORIAS_ORDENADAS = {
+    "classificacao_empresa": ["Detrator", "Neutro", "Promotor"],
+    "flag_alerta": ["URGENTE", "ATENÇÃO", "OK"]
+}
+
+# Colunas repetidas nas tabelas de usuários (inativos / responderam)
+COLUNAS_CATEGORICAS_USUARIOS = ["customer_name", "perfil"]
+
+# Colunas exigidas nas tabelas de usuários (consulta e snapshot em disco)
+COLUNAS_USUARIOS_INATIVOS = ["user_name", "email", "customer_name", "perfil", "ultima_atividade"]
+COLUNAS_USUARIOS_RESPONDERAM = ["user_name", "email", "customer_name", "score", "comment"]
+
+# Colunas de texto livre (alta cardinalidade) armazenadas como string do Arrow
+COLUNAS_TEXTO = ["customer_name", "comentarios_consolidados"]
+
+# Colunas inteiras reduzidas ao menor tipo que comporta os valores
+COLUNAS_INTEIRAS = ["qtd_frota", "qtd_respostas", "tempo_casa_meses", "dias_desde_resposta"]
+
+# Colunas decimais reduzidas para float32 (nota das empresas e score dos usuários)
+COLUNAS_DECIMAIS = ["nota_media_empresa", "score"]
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # STREAMLIT PAGE CONFIG
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -120,6 +197,13 @@ PAGE_CONFIG = {
     "initial_sidebar_state": "expanded"
 }
 
+# Linhas exibidas por página nas tabelas de clientes/detratores e de usuários
+TAMANHO_PAGINA_CLIENTES = 50
+TAMANHO_PAGINA_USUARIOS = 200
+
+# Máximo de comentários exibidos por classificação (mais recentes)
+MAX_COMENTARIOS_POR_CLASSIFICACAO = 20
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # CSS CUSTOMIZADO
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -189,6 +273,11 @@ CUSTOM_CSS = f"""
     }}
 
     /* Cards Customizados */
+    .metric-grid {{
+        display: grid;
+        gap: 1rem;
+    }}
+
     .metric-card {{
         background: linear-gradient(135deg, {COLORS['card']} 0%, #252525 100%);
         padding: 24px;
@@ -312,7 +401,7 @@ NOTA_RANGES = {
 # STOPWORDS PARA WORDCLOUD (PORTUGUÊS)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-STOPWORDS_PT = set([
+STOPWORDS_PT = frozenset([
     'a', 'o', 'e', 'é', 'de', 'da', 'do', 'em', 'um', 'uma', 'os', 'as',
     'dos', 'das', 'no', 'na', 'nos', 'nas', 'ao', 'aos', 'à', 'às',
     'por', 'para', 'com', 'sem', 'sob', 'sobre', 'mas', 'mais', 'menos',
@@ -330,3 +419,11 @@ STOPWORDS_PT = set([
 # ═══════════════════════════════════════════════════════════════════════════════
 
 CACHE_TTL = 3600  # 1 hora em segundos
+
+# Snapshots em disco da carga sem filtros e das tabelas de usuários (sobrevivem
+# a reinícios do container; expiram pelo mesmo CACHE_TTL, contado pela data de
+# modificação do arquivo)
+CACHE_DISCO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+CACHE_DISCO_ARQUIVO = os.path.join(CACHE_DISCO_DIR, "dados_nps.parquet")
+CACHE_DISCO_INATIVOS = os.path.join(CACHE_DISCO_DIR, "usuarios_inativos.parquet")
+CACHE_DISCO_RESPONDERAM = os.path.join(CACHE_DISCO_DIR, "usuarios_responderam.parquet")
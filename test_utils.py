@@ -10,11 +10,33 @@ from utils import (
     calcular_nps,
     calcular_nps_ponderado,
     calcular_distribuicao_classificacao,
+    calcular_resumo_executivo,
     formatar_numero,
     formatar_data,
     truncar_texto,
     get_cor_nps,
-    validar_dados
+    get_cores_nps,
+    get_cores_nota,
+    get_cor_nota,
+    validar_dados,
+    otimizar_tipos,
+    adicionar_colunas_derivadas,
+    calcular_nps_por_segmento,
+    calcular_nps_por_segmentos,
+    processar_comentarios_por_classificacao,
+    filtrar_detratores_prioritarios,
+    eh_comentario_valido,
+    criar_heatmap_data,
+    contar_top_n,
+    criar_distribuicao_notas,
+    formatar_numero_serie,
+    formatar_data_serie,
+    truncar_texto_serie,
+    adicionar_emoji_serie,
+    criar_card_metrica,
+    criar_card_comentario,
+    criar_grade_cards,
+    gerar_csv
 )
 
 
@@ -130,6 +152,151 @@ def test_calcular_distribuicao_vazio(df_vazio):
     assert dist['Detrator'] == 0
 
 
+def test_calcular_resumo_executivo(df_exemplo):
+    """
+    Testa KPIs executivos em um único groupby (iguais aos cálculos individuais).
+    """
+    df = df_exemplo.assign(qtd_respostas=[3, 1, 2, 5, 4])
+    df.loc[4, 'classificacao_empresa'] = None
+    resumo = calcular_resumo_executivo(otimizar_tipos(df))
+
+    assert resumo['nps_geral'] == calcular_nps(df)
+    assert resumo['nps_ponderado'] == calcular_nps_ponderado(df)
+    assert resumo['distribuicao'] == calcular_distribuicao_classificacao(df)
+    assert resumo['total_empresas'] == 5
+    assert resumo['total_respostas'] == 15
+    assert resumo['total_frota'] == 575
+    assert resumo['frota_risco'] == 200
+
+
+def test_calcular_resumo_executivo_vazio(df_vazio):
+    """
+    Testa KPIs executivos com DataFrame vazio.
+    """
+    resumo = calcular_resumo_executivo(df_vazio)
+    assert resumo['nps_geral'] == 0.0
+    assert resumo['frota_risco'] == 0
+    assert resumo['distribuicao'] == calcular_distribuicao_classificacao(df_vazio)
+
+
+def test_calcular_nps_por_segmentos(df_exemplo):
+    """
+    Testa NPS por segmento em uma passada (igual ao cálculo por segmento).
+    """
+    resultado = calcular_nps_por_segmentos(df_exemplo, ['tipo_cliente'])['tipo_cliente']
+    esperado = calcular_nps_por_segmento(df_exemplo, 'tipo_cliente')
+
+    resultado = resultado.sort_values('segmento').reset_index(drop=True)
+    esperado = esperado.sort_values('segmento').reset_index(drop=True)
+    assert resultado['segmento'].tolist() == esperado['segmento'].tolist()
+    assert resultado['nps'].tolist() == esperado['nps'].tolist()
+    assert resultado['quantidade'].tolist() == esperado['quantidade'].tolist()
+    # DAF: 2 promotores e 1 neutro em 3 empresas
+    assert resultado.set_index('segmento').loc['DAF', 'nps'] == 66.7
+
+
+def test_calcular_nps_por_segmentos_vazio(df_vazio):
+    """
+    Testa NPS por segmento com DataFrame vazio.
+    """
+    resultado = calcular_nps_por_segmentos(df_vazio, ['tipo_cliente'])
+    assert resultado['tipo_cliente'].empty
+
+
+def test_criar_heatmap_data():
+    """
+    Testa matriz do heatmap (média de nota por Frota × Tempo de Casa).
+    """
+    df = pd.DataFrame({
+        'customer_id': [1, 2, 3, 4],
+        'faixa_frota': ['1-10', '1-10', '11-50', None],
+        'faixa_tempo_casa': ['0-6', '0-6', '6-12', '0-6'],
+        'nota_media_empresa': [9.0, 7.0, 5.0, 10.0]
+    })
+    matriz = criar_heatmap_data(otimizar_tipos(df))
+    assert matriz.index.tolist() == ['1-10', '11-50']
+    assert matriz.columns.tolist() == ['0-6', '6-12']
+    assert matriz.loc['1-10', '0-6'] == 8.0
+    assert matriz.loc['11-50', '6-12'] == 5.0
+    assert np.isnan(matriz.loc['1-10', '6-12'])
+
+
+def test_criar_distribuicao_notas(df_exemplo):
+    """
+    Testa distribuição das notas arredondadas de 0 a 10 (nulos ignorados).
+    """
+    df = df_exemplo.assign(nota_media_empresa=[9.5, 7.5, 5.0, np.nan, 10.0])
+    resultado = criar_distribuicao_notas(df)
+    assert resultado['nota'].tolist() == list(range(11))
+    # Arredondamento bancário, como Series.round: 9.5 -> 10, 7.5 -> 8
+    assert resultado.set_index('nota')['quantidade'].to_dict() == {
+        0: 0, 1: 0, 2: 0, 3: 0, 4: 0, 5: 1, 6: 0, 7: 0, 8: 1, 9: 0, 10: 2
+    }
+    derivado = criar_distribuicao_notas(adicionar_colunas_derivadas(otimizar_tipos(df)))
+    assert derivado['quantidade'].tolist() == resultado['quantidade'].tolist()
+
+
+def test_contar_top_n():
+    """
+    Testa top n por contagem (igual ao value_counts().head(n)).
+    """
+    serie = pd.Series(['A', 'B', 'A', 'C', 'B', 'A', None, 'D'], name='customer_name')
+    resultado = contar_top_n(serie.astype('category'), 2)
+    assert resultado.index.tolist() == ['A', 'B']
+    assert resultado.tolist() == [3, 2]
+    assert contar_top_n(serie, 10).sum() == 7
+    assert contar_top_n(serie.iloc[:0], 10).empty
+
+
+def test_filtrar_detratores_prioritarios():
+    """
+    Testa filtro de detratores ordenado por flag de alerta e frota.
+    """
+    df = pd.DataFrame({
+        'customer_name': ['A', 'B', 'C', 'D', 'E'],
+        'classificacao_empresa': ['Detrator', 'Promotor', 'Detrator', 'Detrator', 'Detrator'],
+        'flag_alerta': ['OK', 'URGENTE', 'ATENÇÃO', 'URGENTE', 'URGENTE'],
+        'qtd_frota': [100, 500, 10, 20, 50]
+    })
+    resultado = filtrar_detratores_prioritarios(df)
+    assert resultado['customer_name'].tolist() == ['E', 'D', 'C', 'A']
+    assert list(resultado.columns) == list(df.columns)
+    assert filtrar_detratores_prioritarios(df[df['classificacao_empresa'] == 'Promotor']).empty
+
+
+def test_processar_comentarios_top_n():
+    """
+    Testa limite de comentários por classificação (mais recentes primeiro).
+    """
+    df = pd.DataFrame({
+        'customer_name': ['A', 'B', 'C', 'D'],
+        'nota_media_empresa': [9.5, 10.0, 3.0, 9.0],
+        'classificacao_empresa': ['Promotor', 'Promotor', 'Detrator', 'Promotor'],
+        'comentarios_consolidados': [
+            'Sistema muito bom e completo', 'Atendimento excelente sempre',
+            'Plataforma lenta demais', '10'
+        ],
+        'ultima_resposta': pd.to_datetime(['2026-01-01', '2026-02-01', '2026-01-15', '2026-03-01'])
+    })
+    comentarios = processar_comentarios_por_classificacao(df, top_n=1)
+    # D é o mais recente, mas '10' não é um comentário válido
+    assert [c['empresa'] for c in comentarios['Promotor']] == ['B']
+    assert [c['empresa'] for c in comentarios['Detrator']] == ['C']
+    assert comentarios['Neutro'] == []
+
+
+def test_eh_comentario_valido():
+    """
+    Testa filtro de comentários (notas soltas e textos curtos são inválidos).
+    """
+    assert eh_comentario_valido("Sistema muito bom e completo")
+    assert not eh_comentario_valido(None)
+    assert not eh_comentario_valido("10")
+    assert not eh_comentario_valido("1.000,00")
+    assert not eh_comentario_valido("bom demais")
+    assert not eh_comentario_valido("excelentesistema")
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # TESTES DE FORMATAÇÃO
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -204,6 +371,64 @@ def test_truncar_texto_nan():
     assert truncar_texto(None) == "-"
 
 
+def test_formatar_numero_serie():
+    """
+    Testa formatação vetorizada de números (igual a formatar_numero).
+    """
+    serie = pd.Series([1000, 50, np.nan])
+    resultado = formatar_numero_serie(serie)
+    assert resultado.tolist() == [formatar_numero(v) for v in serie]
+    assert resultado.tolist() == ["1.000", "50", "-"]
+
+
+def test_formatar_numero_serie_valores_repetidos():
+    """
+    Testa formatação de valores repetidos, inteiros anuláveis e índice preservado.
+    """
+    serie = pd.Series(pd.array([7, None, 7, 1500], dtype='Int16'), index=[10, 11, 12, 13])
+    resultado = formatar_numero_serie(serie, 0, " pts")
+    assert resultado.tolist() == ["7 pts", "-", "7 pts", "1.500 pts"]
+    assert resultado.index.tolist() == [10, 11, 12, 13]
+
+
+def test_formatar_numero_serie_decimais():
+    """
+    Testa separadores pt-BR com casas decimais (milhar com ponto, decimal com vírgula).
+    """
+    serie = pd.Series(np.array([1234.56, 8.5, np.nan], dtype=np.float32))
+    resultado = formatar_numero_serie(serie, 1)
+    assert resultado.tolist() == [formatar_numero(v, 1) for v in serie]
+    assert resultado.tolist() == ["1.234,6", "8,5", "-"]
+    assert formatar_numero(1234567.891, 3) == "1.234.567,891"
+
+
+def test_formatar_data_serie():
+    """
+    Testa formatação vetorizada de datas.
+    """
+    serie = pd.Series(["2026-01-06", None])
+    assert formatar_data_serie(serie).tolist() == ["06/01/2026", "-"]
+
+
+def test_truncar_texto_serie():
+    """
+    Testa truncamento vetorizado de textos.
+    """
+    serie = pd.Series(["Texto curto", "A" * 150, None])
+    resultado = truncar_texto_serie(serie, 100)
+    assert resultado.tolist() == [truncar_texto(v, 100) for v in serie]
+
+
+def test_adicionar_emoji_serie():
+    """
+    Testa adição vetorizada de emoji (valores sem emoji ficam inalterados).
+    """
+    from config import CLASSIFICACAO_EMOJI
+    serie = pd.Series(['Promotor', 'Detrator', 'Outro'])
+    resultado = adicionar_emoji_serie(serie, CLASSIFICACAO_EMOJI)
+    assert resultado.tolist() == ['😊 Promotor', '😞 Detrator', 'Outro']
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # TESTES DE COR
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -235,6 +460,70 @@ def test_get_cor_nps_negativo():
     assert cor == COLORS['detrator']
 
 
+def test_get_cores_vetorizado():
+    """
+    Testa cores vetorizadas (iguais às versões escalares).
+    """
+    valores_nps = [60, 50, 25, 0, -10, np.nan]
+    assert get_cores_nps(pd.Series(valores_nps)) == [get_cor_nps(v) for v in valores_nps]
+
+    notas = list(range(11))
+    assert get_cores_nota(np.array(notas)) == [get_cor_nota(v) for v in notas]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TESTES DE HTML (CARDS)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def test_criar_grade_cards():
+    """
+    Testa agrupamento de cards em uma única grade.
+    """
+    cards = [
+        criar_card_metrica("NPS GERAL", "20.0", "% Promotores - % Detratores", "#10B981"),
+        criar_card_metrica("FROTA TOTAL", "575", "200 em risco", "#F59E0B", "#EF4444")
+    ]
+    grade = criar_grade_cards(cards)
+    assert grade.count("class='metric-card'") == 2
+    assert "repeat(2, 1fr)" in grade
+    assert grade.count("<div") == grade.count("</div>")
+
+
+def test_criar_card_comentario_escapa_html():
+    """
+    Testa que o comentário é escapado e o card fica com as divs fechadas.
+    """
+    com = {'empresa': 'Empresa A', 'nota': 3.0, 'data': '06/01/2026', 'comentario': '<b>ruim</b>'}
+    card = criar_card_comentario(com, "#EF4444", "rgba(239, 68, 68, 0.1)")
+    assert "&lt;b&gt;ruim&lt;/b&gt;" in card
+    assert "Nota: 3,0" in card
+    assert card.count("<div") == card.count("</div>")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TESTES DE EXPORTAÇÃO
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def test_gerar_csv():
+    """
+    Testa exportação CSV com BOM (mesmo conteúdo lido pelo pandas).
+    """
+    import io
+    df = pd.DataFrame({
+        'Empresa': ['Empresa A', 'Empresa, "B"'],
+        'Classificação': pd.Categorical(['Promotor', None]),
+        'Frota': ['1.000', '50']
+    })
+    conteudo = gerar_csv(df)
+    assert conteudo.startswith(b"\xef\xbb\xbf")
+
+    lido = pd.read_csv(io.BytesIO(conteudo), encoding='utf-8-sig', dtype=str)
+    assert lido.columns.tolist() == ['Empresa', 'Classificação', 'Frota']
+    assert lido['Empresa'].tolist() == ['Empresa A', 'Empresa, "B"']
+    assert lido['Frota'].tolist() == ['1.000', '50']
+    assert lido['Classificação'].isna().tolist() == [False, True]
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # TESTES DE VALIDAÇÃO
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -271,6 +560,82 @@ def test_validar_dados_colunas_faltando():
     assert "faltando" in mensagem.lower()
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# TESTES DE OTIMIZAÇÃO DE TIPOS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def test_otimizar_tipos(df_exemplo):
+    """
+    Testa conversão para category e redução dos tipos numéricos.
+    """
+    df = otimizar_tipos(df_exemplo)
+    assert isinstance(df['tipo_cliente'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['classificacao_empresa'].dtype, pd.CategoricalDtype)
+    assert df['qtd_frota'].dtype == np.int16
+    assert df['nota_media_empresa'].dtype == np.float32
+    assert df['customer_name'].dtype == pd.StringDtype("pyarrow")
+    assert calcular_nps(df) == calcular_nps(df_exemplo)
+    # Classificação ordenada: Detrator < Neutro < Promotor
+    assert df['classificacao_empresa'].cat.ordered
+    assert df.sort_values('classificacao_empresa')['classificacao_empresa'].iloc[0] == 'Detrator'
+
+
+def test_otimizar_tipos_colunas_categoricas():
+    """
+    Testa conversão para category de uma lista de colunas informada.
+    """
+    df = pd.DataFrame({'customer_name': ['A', 'B', 'A'], 'perfil': ['adm', 'adm', None]})
+    resultado = otimizar_tipos(df, ['customer_name', 'perfil', 'inexistente'])
+    assert isinstance(resultado['customer_name'].dtype, pd.CategoricalDtype)
+    assert resultado['customer_name'].cat.categories.tolist() == ['A', 'B']
+    assert resultado['perfil'].isna().sum() == 1
+
+
+def test_otimizar_tipos_colunas_nulas():
+    """
+    Testa redução de colunas numéricas com nulos (inteiro anulável e score).
+    """
+    df = pd.DataFrame({
+        'dias_desde_resposta': pd.array([10, None, 400], dtype='Int64'),
+        'score': [9.0, None, 3.0]
+    })
+    resultado = otimizar_tipos(df)
+    assert resultado['dias_desde_resposta'].dtype == 'Int16'
+    assert resultado['dias_desde_resposta'].isna().sum() == 1
+    assert resultado['score'].dtype == np.float32
+
+
+def test_otimizar_tipos_categorias_desconhecidas():
+    """
+    Testa que valores fora da ordem fixa são mantidos (no fim da ordem) e
+    que flags desconhecidas são priorizadas junto com OK.
+    """
+    df = pd.DataFrame({
+        'customer_name': ['A', 'B', 'C', 'D'],
+        'classificacao_empresa': ['Detrator', 'Detrator', 'Passivo', 'Detrator'],
+        'flag_alerta': ['Atenção', 'URGENTE', 'OK', 'OK'],
+        'qtd_frota': [30, 10, 5, 20]
+    })
+    resultado = otimizar_tipos(df)
+    assert resultado['classificacao_empresa'].tolist() == df['classificacao_empresa'].tolist()
+    assert list(resultado['flag_alerta'].cat.categories) == ['URGENTE', 'ATENÇÃO', 'OK', 'Atenção']
+    assert resultado['flag_alerta'].notna().all()
+    prioritarios = filtrar_detratores_prioritarios(resultado)
+    assert prioritarios['customer_name'].tolist() == ['B', 'A', 'D']
+
+
+def test_adicionar_colunas_derivadas(df_exemplo):
+    """
+    Testa flags e nota arredondada calculadas no carregamento.
+    """
+    df = adicionar_colunas_derivadas(otimizar_tipos(df_exemplo))
+    assert df['eh_promotor'].tolist() == [True, False, False, False, True]
+    assert df['eh_detrator'].tolist() == [False, False, True, False, False]
+    assert df['nota_arredondada'].tolist() == [10, 8, 5, 8, 10]
+    assert calcular_nps(df) == calcular_nps(df_exemplo)
+    assert calcular_nps_ponderado(df) == calcular_nps_ponderado(df_exemplo)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # EXECUTAR TESTES
 # ═══════════════════════════════════════════════════════════════════════════════
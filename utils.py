@@ -3,16 +3,48 @@ Funções auxiliares para o Dashboard NPS - Gobrax
 Cálculos de métricas, formatações e processamento de dados
 """
 
+import html
+import io
+import re
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from datetime import datetime
-from config import COLORS, CLASSIFICACAO_EMOJI, FLAG_EMOJI, NOTA_RANGES
+from config import (
+    COLORS, CLASSIFICACAO_EMOJI, FLAG_EMOJI, NOTA_RANGES,
+    COLUNAS_CATEGORICAS, COLUNAS_TEXTO, COLUNAS_INTEIRAS, COLUNAS_DECIMAIS, CATEGORIAS_ORDENADAS,
+    COLUNAS_OBRIGATORIAS, MAX_COMENTARIOS_POR_CLASSIFICACAO
+)
+
+# Expressões regulares dos comentários, compiladas uma única vez
+_REGEX_PALAVRA = re.compile(r'\b[a-zA-ZÀ-ÿ]{2,}\b')
+_REGEX_LETRA = re.compile(r'[a-zA-ZÀ-ÿ]')
+_REGEX_PONTUACAO = re.compile(r'[^\w\s]')
+_REGEX_NUMEROS = re.compile(r'\d+')
+
+# Especificações de formato numérico pré-montadas e troca de separadores para pt-BR
+# (1,234.5 -> 1.234,5)
+_FORMATOS_NUMERO = {0: ",.0f", 1: ",.1f", 2: ",.2f"}
+_SEPARADORES_PT_BR = str.maketrans({",": ".", ".": ","})
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CÁLCULOS DE NPS
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _flags_classificacao(df: pd.DataFrame) -> tuple:
+    """
+    Retorna as flags (arrays booleanos) de promotor e detrator, usando as
+    colunas pré-calculadas em adicionar_colunas_derivadas quando existirem.
+    """
+    if 'eh_promotor' in df.columns and 'eh_detrator' in df.columns:
+        return df['eh_promotor'].to_numpy(), df['eh_detrator'].to_numpy()
+
+    classificacao = df['classificacao_empresa']
+    return (classificacao == 'Promotor').to_numpy(), (classificacao == 'Detrator').to_numpy()
+
+
 def calcular_nps(df: pd.DataFrame) -> float:
     """
     Calcula o NPS geral baseado na classificação das empresas.
@@ -28,8 +60,9 @@ def calcular_nps(df: pd.DataFrame) -> float:
         return 0.0
 
     total = len(df)
-    promotores = len(df[df['classificacao_empresa'] == 'Promotor'])
-    detratores = len(df[df['classificacao_empresa'] == 'Detrator'])
+    eh_promotor, eh_detrator = _flags_classificacao(df)
+    promotores = int(eh_promotor.sum())
+    detratores = int(eh_detrator.sum())
 
     pct_promotores = (promotores / total) * 100
     pct_detratores = (detratores / total) * 100
@@ -52,19 +85,19 @@ def calcular_nps_ponderado(df: pd.DataFrame) -> float:
     if df.empty or 'qtd_frota' not in df.columns or 'classificacao_empresa' not in df.columns:
         return 0.0
 
-    df_clean = df.dropna(subset=['qtd_frota', 'classificacao_empresa'])
+    # Considerar apenas linhas com frota e classificação (sem copiar o DataFrame:
+    # a frota das demais linhas vira 0 e não entra em nenhuma soma)
+    frota = df['qtd_frota'].to_numpy(dtype=np.float64, na_value=np.nan)
+    validos = ~np.isnan(frota) & df['classificacao_empresa'].notna().to_numpy()
+    frota = np.where(validos, frota, 0.0)
+    eh_promotor, eh_detrator = _flags_classificacao(df)
 
-    if df_clean.empty:
-        return 0.0
-
-    # Soma da frota dos promotores
-    frota_promotores = df_clean[df_clean['classificacao_empresa'] == 'Promotor']['qtd_frota'].sum()
-
-    # Soma da frota dos detratores
-    frota_detratores = df_clean[df_clean['classificacao_empresa'] == 'Detrator']['qtd_frota'].sum()
+    # Soma da frota dos promotores e dos detratores (produto escalar, sem arrays filtrados)
+    frota_promotores = np.dot(frota, eh_promotor)
+    frota_detratores = np.dot(frota, eh_detrator)
 
     # Soma total da frota
-    frota_total = df_clean['qtd_frota'].sum()
+    frota_total = frota.sum()
 
     if frota_total == 0:
         return 0.0
@@ -89,23 +122,84 @@ def calcular_distribuicao_classificacao(df: pd.DataFrame) -> dict:
         return {"Promotor": 0, "Neutro": 0, "Detrator": 0}
 
     total = len(df)
+    # Uma única contagem em vez de um filtro por classificação
+    contagens = df['classificacao_empresa'].value_counts()
     distribuicao = {}
 
     for classif in ['Promotor', 'Neutro', 'Detrator']:
-        count = len(df[df['classificacao_empresa'] == classif])
-        pct = (count / total) * 100
+        pct = (int(contagens.get(classif, 0)) / total) * 100
         distribuicao[classif] = round(pct, 1)
 
     return distribuicao
 
 
+def calcular_resumo_executivo(df: pd.DataFrame) -> dict:
+    """
+    Calcula os KPIs da Visão Executiva (NPS, NPS ponderado, totais, frota
+    em risco e distribuição) a partir de um único groupby por classificação.
+
+    Args:
+        df: DataFrame com colunas 'classificacao_empresa', 'qtd_frota' e 'qtd_respostas'
+
+    Returns:
+        dict: nps_geral, nps_ponderado, total_empresas, total_respostas,
+              total_frota, frota_risco e distribuicao
+    """
+    classificacoes = ['Promotor', 'Neutro', 'Detrator']
+
+    if df.empty:
+        return {
+            'nps_geral': 0.0,
+            'nps_ponderado': 0.0,
+            'total_empresas': 0,
+            'total_respostas': 0,
+            'total_frota': 0,
+            'frota_risco': 0,
+            'distribuicao': {c: 0 for c in classificacoes}
+        }
+
+    # Uma única passada: quantidade, frota e respostas por classificação
+    # (dropna=False mantém empresas sem classificação nos totais)
+    agregado = df.groupby('classificacao_empresa', observed=True, dropna=False).agg(
+        n=('qtd_frota', 'size'),
+        frota=('qtd_frota', 'sum'),
+        respostas=('qtd_respostas', 'sum')
+    )
+    classificado = agregado.reindex(classificacoes, fill_value=0)
+
+    total = len(df)
+    pct = classificado['n'] / total * 100
+    distribuicao = {c: round(float(pct[c]), 1) for c in classificacoes}
+
+    # NPS ponderado considera apenas empresas classificadas
+    frota_classificada = agregado.loc[agregado.index.notna(), 'frota'].sum()
+    if frota_classificada == 0:
+        nps_ponderado = 0.0
+    else:
+        nps_ponderado = round(float(
+            (classificado.loc['Promotor', 'frota'] - classificado.loc['Detrator', 'frota'])
+            / frota_classificada * 100
+        ), 2)
+
+    return {
+        'nps_geral': round(float(pct['Promotor'] - pct['Detrator']), 1),
+        'nps_ponderado': nps_ponderado,
+        'total_empresas': total,
+        'total_respostas': agregado['respostas'].sum(),
+        'total_frota': agregado['frota'].sum(),
+        'frota_risco': classificado.loc['Detrator', 'frota'],
+        'distribuicao': distribuicao
+    }
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # FUNÇÕES DE FORMATAÇÃO
 # ═══════════════════════════════════════════════════════════════════════════════
 
 def formatar_numero(valor: float, decimais: int = 0, sufixo: str = "") -> str:
     """
-    Formata número para exibição com separadores de milhar.
+    Formata número para exibição no padrão pt-BR (milhar com ponto,
+    decimal com vírgula).
 
     Args:
         valor: Número a formatar
@@ -118,10 +212,8 @@ def formatar_numero(valor: float, decimais: int = 0, sufixo: str = "") -> str:
     if pd.isna(valor):
         return "-"
 
-    formato = f"{{:,.{decimais}f}}"
-    numero_formatado = formato.format(valor).replace(",", ".")
-
-    return f"{numero_formatado}{sufixo}"
+    formato = _FORMATOS_NUMERO.get(decimais) or f",.{decimais}f"
+    return format(valor, formato).translate(_SEPARADORES_PT_BR) + sufixo
 
 
 def formatar_data(data) -> str:
@@ -199,6 +291,92 @@ def adicionar_emoji_flag(flag: str) -> str:
     return f"{emoji} {flag}" if emoji else flag
 
 
+def _formatar_valores_unicos(serie: pd.Series, formatar, nulo: str = "-") -> pd.Series:
+    """
+    Aplica `formatar` apenas aos valores distintos da série e expande o
+    resultado pelos códigos (colunas de tabela repetem muito os mesmos valores).
+
+    Args:
+        serie: Série a formatar
+        formatar: Função que formata um valor não nulo
+        nulo: Texto usado para valores nulos
+
+    Returns:
+        pd.Series: Valores formatados (dtype object, mesmo índice)
+    """
+    codigos, unicos = pd.factorize(serie)
+    # Código -1 (nulo) seleciona o último elemento
+    textos = np.array([formatar(valor) for valor in unicos] + [nulo], dtype=object)
+    return pd.Series(textos[codigos], index=serie.index, dtype=object)
+
+
+def formatar_numero_serie(serie: pd.Series, decimais: int = 0, sufixo: str = "") -> pd.Series:
+    """
+    Versão vetorizada de formatar_numero para uma coluna inteira.
+
+    Args:
+        serie: Série numérica a formatar
+        decimais: Casas decimais
+        sufixo: Sufixo opcional (%, pontos, etc)
+
+    Returns:
+        pd.Series: Números formatados ("-" para nulos)
+    """
+    formato = _FORMATOS_NUMERO.get(decimais) or f",.{decimais}f"
+    return _formatar_valores_unicos(
+        serie, lambda valor: format(valor, formato).translate(_SEPARADORES_PT_BR) + sufixo
+    )
+
+
+def formatar_data_serie(serie: pd.Series) -> pd.Series:
+    """
+    Versão vetorizada de formatar_data para uma coluna inteira (DD/MM/YYYY).
+
+    Args:
+        serie: Série de datas (datetime ou string)
+
+    Returns:
+        pd.Series: Datas formatadas ("-" para nulos ou inválidas)
+    """
+    # Normalizar para o dia: horários diferentes no mesmo dia viram um único valor
+    datas = pd.to_datetime(serie, errors='coerce').dt.normalize()
+    return _formatar_valores_unicos(datas, lambda data: data.strftime("%d/%m/%Y"))
+
+
+def truncar_texto_serie(serie: pd.Series, max_chars: int = 100) -> pd.Series:
+    """
+    Versão vetorizada de truncar_texto para uma coluna inteira.
+
+    Args:
+        serie: Série de textos
+        max_chars: Número máximo de caracteres
+
+    Returns:
+        pd.Series: Textos truncados ("-" para nulos)
+    """
+    nulos = serie.isna()
+    texto = serie.astype(object).astype(str)
+    longo = texto.str.len() > max_chars
+    texto = texto.where(~longo, texto.str.slice(0, max_chars) + "...")
+    return texto.astype(object).mask(nulos, "-")
+
+
+def adicionar_emoji_serie(serie: pd.Series, emojis: dict) -> pd.Series:
+    """
+    Versão vetorizada de adicionar_emoji_classificacao/adicionar_emoji_flag.
+
+    Args:
+        serie: Série com classificações ou flags
+        emojis: Mapeamento valor -> emoji (CLASSIFICACAO_EMOJI ou FLAG_EMOJI)
+
+    Returns:
+        pd.Series: Valores com emoji (inalterados se não houver emoji)
+    """
+    valores = serie.astype(object)
+    mapa = {valor: f"{emoji} {valor}" for valor, emoji in emojis.items()}
+    return valores.map(mapa).fillna(valores)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # FUNÇÕES DE COR E ESTILO
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -221,6 +399,24 @@ def get_cor_nps(nps: float) -> str:
         return COLORS['detrator']  # Vermelho
 
 
+def get_cores_nps(valores) -> list:
+    """
+    Versão vetorizada de get_cor_nps para uma coluna de valores de NPS.
+
+    Args:
+        valores: Series ou array com valores de NPS
+
+    Returns:
+        list: Códigos de cor hexadecimal, na mesma ordem dos valores
+    """
+    nps = np.asarray(valores, dtype=np.float64)
+    return np.select(
+        [nps >= 50, nps >= 0],
+        [COLORS['promotor'], COLORS['neutro']],
+        default=COLORS['detrator']
+    ).tolist()
+
+
 def get_cor_classificacao(classificacao: str) -> str:
     """
     Retorna a cor baseada na classificação.
@@ -257,10 +453,195 @@ def get_cor_nota(nota: float) -> str:
         return COLORS['detrator']
 
 
+def get_cores_nota(valores) -> list:
+    """
+    Versão vetorizada de get_cor_nota para uma coluna de notas (0-10).
+
+    Args:
+        valores: Series ou array com notas
+
+    Returns:
+        list: Códigos de cor hexadecimal, na mesma ordem dos valores
+    """
+    notas = np.asarray(valores, dtype=np.float64)
+    return np.select(
+        [notas >= 9, notas >= 7],
+        [COLORS['promotor'], COLORS['neutro']],
+        default=COLORS['detrator']
+    ).tolist()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# FUNÇÕES DE HTML (CARDS)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def criar_card_metrica(label: str, valor: str, subtitulo: str, cor: str,
+                       cor_subtitulo: str = None) -> str:
+    """
+    Gera o HTML de um card de métrica (classe 'metric-card').
+
+    Args:
+        label: Título do card
+        valor: Valor já formatado
+        subtitulo: Texto abaixo do valor
+        cor: Cor da borda e do valor
+        cor_subtitulo: Cor opcional do subtítulo
+
+    Returns:
+        str: HTML do card
+    """
+    estilo_subtitulo = f" style='color: {cor_subtitulo};'" if cor_subtitulo else ""
+    return (
+        f"<div class='metric-card' style='border-left: 4px solid {cor};'>"
+        f"<div class='metric-label'>{label}</div>"
+        f"<div class='metric-value' style='color: {cor};'>{valor}</div>"
+        f"<div class='metric-subtitle'{estilo_subtitulo}>{subtitulo}</div>"
+        f"</div>"
+    )
+
+
+def criar_card_percentual(pct: float, label: str, cor: str, fundo: str) -> str:
+    """
+    Gera o HTML de um card de percentual da distribuição de classificação.
+
+    Args:
+        pct: Percentual (0-100)
+        label: Texto abaixo do percentual
+        cor: Cor do percentual
+        fundo: Cor de fundo do card
+
+    Returns:
+        str: HTML do card
+    """
+    return (
+        f"<div style='text-align: center; padding: 20px; background: {fundo}; border-radius: 8px;'>"
+        f"<div style='font-size: 32px; font-weight: 700; color: {cor};'>{formatar_numero(pct, 1, '%')}</div>"
+        f"<div style='font-size: 14px; color: {COLORS['text_secondary']};'>{label}</div>"
+        f"</div>"
+    )
+
+
+def criar_card_comentario(comentario: dict, cor: str, fundo: str) -> str:
+    """
+    Gera o HTML de um card de comentário (empresa, nota, data e texto).
+
+    Args:
+        comentario: Dict com 'empresa', 'nota', 'data' e 'comentario'
+        cor: Cor da borda e do título
+        fundo: Cor de fundo do card
+
+    Returns:
+        str: HTML do card (empresa e comentário escapados)
+    """
+    return (
+        f"<div style='background: {fundo}; padding: 15px; border-radius: 8px; "
+        f"border-left: 4px solid {cor}; margin-bottom: 10px;'>"
+        f"<div style='font-weight: 600; color: {cor};'>"
+        f"{html.escape(str(comentario['empresa']))} - Nota: {formatar_numero(comentario['nota'], 1)} | {comentario['data']}"
+        f"</div>"
+        f"<div style='margin-top: 8px; color: {COLORS['text']};'>"
+        f"{html.escape(str(comentario['comentario']))}"
+        f"</div>"
+        f"</div>"
+    )
+
+
+def criar_grade_cards(cards: list) -> str:
+    """
+    Agrupa cards em uma grade de colunas iguais, para renderizar a seção
+    inteira em um único st.markdown.
+
+    Args:
+        cards: Lista de HTML dos cards
+
+    Returns:
+        str: HTML da grade (classe 'metric-grid')
+    """
+    return (
+        f"<div class='metric-grid' style='grid-template-columns: repeat({len(cards)}, 1fr);'>"
+        + "".join(cards)
+        + "</div>"
+    )
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # PROCESSAMENTO DE DADOS
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def otimizar_tipos(df: pd.DataFrame, colunas_categoricas: list = None) -> pd.DataFrame:
+    """
+    Reduz o uso de memória do DataFrame carregado: colunas de baixa
+    cardinalidade viram 'category', textos livres viram string do Arrow e
+    colunas numéricas são reduzidas ao menor tipo que comporta os valores. As demais colunas são
+    compartilhadas com o DataFrame recebido (cópia rasa).
+
+    Args:
+        df: DataFrame carregado do BigQuery
+        colunas_categoricas: Colunas convertidas para 'category'
+            (padrão: COLUNAS_CATEGORICAS, da query principal)
+
+    Returns:
+        pd.DataFrame: DataFrame com tipos otimizados
+    """
+    if colunas_categoricas is None:
+        colunas_categoricas = COLUNAS_CATEGORICAS
+
+    # Cópia rasa: as colunas convertidas são substituídas na cópia e as demais
+    # (inclusive os textos longos) são compartilhadas, sem duplicar memória
+    df = df.copy(deep=False)
+
+    for col in colunas_categoricas:
+        if col in df.columns:
+            if col in CATEGORIAS_ORDENADAS:
+                # Valores fora da ordem fixa (ex.: flag nova na view) entram no
+                # fim da ordem em vez de virarem NaN
+                ordem = CATEGORIAS_ORDENADAS[col]
+                extras = sorted(set(df[col].dropna().unique()).difference(ordem), key=str)
+                df[col] = df[col].astype(pd.CategoricalDtype(ordem + extras, ordered=True))
+            else:
+                df[col] = df[col].astype('category')
+
+    # Textos livres: buffer contíguo do Arrow em vez de um objeto Python por valor
+    # (colunas já categóricas, como customer_name nas tabelas de usuários, ficam como estão)
+    for col in COLUNAS_TEXTO:
+        if col in df.columns and col not in colunas_categoricas:
+            df[col] = df[col].astype(pd.StringDtype("pyarrow"))
+
+    for col in COLUNAS_INTEIRAS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    for col in COLUNAS_DECIMAIS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col]).astype('float32')
+
+    return df
+
+
+def adicionar_colunas_derivadas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adiciona as colunas usadas por várias seções, calculadas uma única vez
+    no carregamento: flags de promotor/detrator e a nota arredondada.
+
+    Args:
+        df: DataFrame carregado (após otimizar_tipos)
+
+    Returns:
+        pd.DataFrame: DataFrame com 'eh_promotor', 'eh_detrator' e 'nota_arredondada'
+    """
+    colunas = {}
+
+    if 'classificacao_empresa' in df.columns:
+        classificacao = df['classificacao_empresa']
+        colunas['eh_promotor'] = classificacao.eq('Promotor').to_numpy()
+        colunas['eh_detrator'] = classificacao.eq('Detrator').to_numpy()
+
+    if 'nota_media_empresa' in df.columns:
+        colunas['nota_arredondada'] = df['nota_media_empresa'].round().astype('Int8')
+
+    return df.assign(**colunas)
+
+
 def criar_distribuicao_notas(df: pd.DataFrame) -> pd.DataFrame:
     """
     Cria DataFrame com a distribuição de notas de 0 a 10.
@@ -274,18 +655,17 @@ def criar_distribuicao_notas(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty or 'nota_media_empresa' not in df.columns:
         return pd.DataFrame({'nota': range(11), 'quantidade': [0] * 11})
 
-    # Arredondar notas para inteiro mais próximo
-    df_notas = df.copy()
-    df_notas['nota_arredondada'] = df_notas['nota_media_empresa'].round().astype(int)
-
-    # Contar frequência de cada nota
-    distribuicao = df_notas['nota_arredondada'].value_counts().sort_index()
+    # Arredondar notas para inteiro mais próximo (pré-calculado no carregamento)
+    if 'nota_arredondada' in df.columns:
+        notas_arredondadas = df['nota_arredondada'].to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        notas_arredondadas = np.rint(df['nota_media_empresa'].to_numpy(dtype=np.float64, na_value=np.nan))
 
-    # Criar DataFrame completo (0-10)
-    todas_notas = pd.DataFrame({'nota': range(11)})
-    todas_notas['quantidade'] = todas_notas['nota'].map(distribuicao).fillna(0).astype(int)
+    # Contar frequência de cada nota (0-10) em uma única passada
+    validas = (notas_arredondadas >= 0) & (notas_arredondadas <= 10)
+    quantidade = np.bincount(notas_arredondadas[validas].astype(np.intp), minlength=11)
 
-    return todas_notas
+    return pd.DataFrame({'nota': np.arange(11), 'quantidade': quantidade})
 
 
 def calcular_nps_por_segmento(df: pd.DataFrame, coluna_segmento: str) -> pd.DataFrame:
@@ -299,26 +679,60 @@ def calcular_nps_por_segmento(df: pd.DataFrame, coluna_segmento: str) -> pd.Data
     Returns:
         pd.DataFrame: DataFrame com colunas 'segmento', 'nps', 'quantidade'
     """
-    if df.empty or coluna_segmento not in df.columns:
-        return pd.DataFrame(columns=['segmento', 'nps', 'quantidade'])
+    # Uma única passada agrupada (mesma implementação da versão multi-coluna)
+    return calcular_nps_por_segmentos(df, [coluna_segmento])[coluna_segmento]
 
-    resultados = []
 
-    for segmento in df[coluna_segmento].dropna().unique():
-        df_segmento = df[df[coluna_segmento] == segmento]
-        nps = calcular_nps(df_segmento)
-        quantidade = len(df_segmento)
+def calcular_nps_por_segmentos(df: pd.DataFrame, colunas_segmento: list) -> dict:
+    """
+    Calcula NPS por segmento para várias colunas de uma vez. As flags de
+    promotor/detrator são calculadas uma única vez e cada segmentação é
+    apenas uma soma agrupada.
+
+    Args:
+        df: DataFrame com dados
+        colunas_segmento: Nomes das colunas para segmentar
+
+    Returns:
+        dict: {coluna: DataFrame com colunas 'segmento', 'nps', 'quantidade'}
+    """
+    resultados = {}
 
-        resultados.append({
-            'segmento': segmento,
-            'nps': nps,
+    if df.empty:
+        for coluna in colunas_segmento:
+            resultados[coluna] = pd.DataFrame(columns=['segmento', 'nps', 'quantidade'])
+        return resultados
+
+    # Reduções por código do segmento (np.bincount) em vez de groupby
+    eh_promotor, eh_detrator = _flags_classificacao(df)
+    promotores = eh_promotor.astype(np.float64)
+    detratores = eh_detrator.astype(np.float64)
+
+    for coluna in colunas_segmento:
+        if coluna not in df.columns:
+            resultados[coluna] = pd.DataFrame(columns=['segmento', 'nps', 'quantidade'])
+            continue
+
+        codigos, segmentos = pd.factorize(df[coluna], sort=False)
+        validos = codigos >= 0
+        codigos = codigos[validos]
+        n_segmentos = len(segmentos)
+
+        quantidade = np.bincount(codigos, minlength=n_segmentos)
+        soma_promotores = np.bincount(codigos, weights=promotores[validos], minlength=n_segmentos)
+        soma_detratores = np.bincount(codigos, weights=detratores[validos], minlength=n_segmentos)
+
+        pct_promotores = soma_promotores / quantidade * 100
+        pct_detratores = soma_detratores / quantidade * 100
+
+        df_resultado = pd.DataFrame({
+            'segmento': np.asarray(segmentos),
+            'nps': np.round(pct_promotores - pct_detratores, 1),
             'quantidade': quantidade
         })
+        resultados[coluna] = df_resultado.sort_values('nps', ascending=False)
 
-    df_resultado = pd.DataFrame(resultados)
-    df_resultado = df_resultado.sort_values('nps', ascending=False)
-
-    return df_resultado
+    return resultados
 
 
 def criar_heatmap_data(df: pd.DataFrame) -> pd.DataFrame:
@@ -334,24 +748,64 @@ def criar_heatmap_data(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
 
-    # Agrupar por faixa_frota e faixa_tempo_casa
-    heatmap_data = df.groupby(['faixa_frota', 'faixa_tempo_casa']).agg({
-        'nota_media_empresa': 'mean',
-        'customer_id': 'count'
-    }).reset_index()
+    # Código de cada célula (frota × tempo) para reduzir com np.bincount
+    codigos_frota, frotas = pd.factorize(df['faixa_frota'], sort=True)
+    codigos_tempo, tempos = pd.factorize(df['faixa_tempo_casa'], sort=True)
+    validos = (codigos_frota >= 0) & (codigos_tempo >= 0)
+
+    n_celulas = len(frotas) * len(tempos)
+    celulas = codigos_frota[validos] * len(tempos) + codigos_tempo[validos]
 
-    heatmap_data.columns = ['faixa_frota', 'faixa_tempo_casa', 'nps_medio', 'quantidade']
+    notas = df['nota_media_empresa'].to_numpy(dtype=np.float64, na_value=np.nan)[validos]
+    com_nota = ~np.isnan(notas)
 
-    # Pivotar para criar matriz
-    matriz = heatmap_data.pivot(
-        index='faixa_frota',
-        columns='faixa_tempo_casa',
-        values='nps_medio'
+    empresas = np.bincount(celulas, minlength=n_celulas).reshape(len(frotas), len(tempos))
+    soma_notas = np.bincount(celulas[com_nota], weights=notas[com_nota], minlength=n_celulas)
+    qtd_notas = np.bincount(celulas[com_nota], minlength=n_celulas)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = (soma_notas / qtd_notas).reshape(len(frotas), len(tempos))
+
+    # Pivotar para criar matriz (apenas faixas com empresas)
+    matriz = pd.DataFrame(
+        np.where(empresas > 0, media, np.nan),
+        index=pd.Index(np.asarray(frotas), name='faixa_frota'),
+        columns=pd.Index(np.asarray(tempos), name='faixa_tempo_casa')
     )
+    matriz = matriz.loc[empresas.any(axis=1), empresas.any(axis=0)]
 
     return matriz
 
 
+def contar_top_n(serie: pd.Series, n: int = 10) -> pd.Series:
+    """
+    Retorna os n valores mais frequentes da série com suas contagens, sem
+    ordenar todos os valores únicos (np.bincount + np.argpartition).
+
+    Args:
+        serie: Série com os valores a contar (nulos são ignorados)
+        n: Quantidade de valores retornados
+
+    Returns:
+        pd.Series: Contagens indexadas pelo valor, em ordem decrescente
+    """
+    codigos, valores = pd.factorize(serie)
+    contagens = np.bincount(codigos[codigos >= 0], minlength=len(valores))
+
+    k = min(n, len(contagens))
+    if k == 0:
+        return pd.Series(dtype=np.int64, name='count')
+
+    indices = np.argpartition(-contagens, k - 1)[:k]
+    indices = indices[np.argsort(-contagens[indices], kind='stable')]
+
+    return pd.Series(
+        contagens[indices],
+        index=pd.Index(np.asarray(valores)[indices], name=serie.name),
+        name='count'
+    )
+
+
 def filtrar_detratores_prioritarios(df: pd.DataFrame) -> pd.DataFrame:
     """
     Filtra e ordena detratores por prioridade (urgência e frota).
@@ -365,26 +819,32 @@ def filtrar_detratores_prioritarios(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
 
-    # Filtrar apenas detratores
-    df_detratores = df[df['classificacao_empresa'] == 'Detrator'].copy()
+    # Posições dos detratores (flag pré-calculada quando disponível)
+    _, eh_detrator = _flags_classificacao(df)
+    posicoes = np.flatnonzero(eh_detrator)
 
-    if df_detratores.empty:
+    if posicoes.size == 0:
         return pd.DataFrame()
 
-    # Criar ordem de prioridade para flag_alerta
-    prioridade_flag = {'URGENTE': 1, 'ATENÇÃO': 2, 'OK': 3}
-    df_detratores['ordem_flag'] = df_detratores['flag_alerta'].map(prioridade_flag).fillna(3)
-
-    # Ordenar: primeiro por flag, depois por frota (descendente)
-    df_detratores = df_detratores.sort_values(
-        by=['ordem_flag', 'qtd_frota'],
-        ascending=[True, False]
-    )
+    # Ordem de prioridade para flag_alerta: códigos da categoria ordenada
+    # (URGENTE < ATENÇÃO < OK); flags vazias ou desconhecidas ficam junto com OK
+    flags = df['flag_alerta'].iloc[posicoes]
+    ordem = CATEGORIAS_ORDENADAS['flag_alerta']
+    if (isinstance(flags.dtype, pd.CategoricalDtype) and flags.cat.ordered
+            and list(flags.cat.categories[:len(ordem)]) == ordem):
+        ultimo = len(ordem) - 1
+        codigos = flags.cat.codes.to_numpy()
+        ordem_flag = np.where((codigos < 0) | (codigos > ultimo), ultimo, codigos)
+    else:
+        prioridade_flag = {'URGENTE': 1, 'ATENÇÃO': 2, 'OK': 3}
+        ordem_flag = flags.map(prioridade_flag).astype(float).fillna(3).to_numpy()
+    frota = df['qtd_frota'].iloc[posicoes].to_numpy(dtype=float, na_value=np.nan)
 
-    # Remover coluna auxiliar
-    df_detratores = df_detratores.drop('ordem_flag', axis=1)
+    # Ordenar: primeiro por flag, depois por frota (descendente), e
+    # materializar as linhas uma única vez
+    ordem = np.lexsort((-frota, ordem_flag))
 
-    return df_detratores
+    return df.iloc[posicoes[ordem]]
 
 
 def eh_comentario_valido(comentario: str) -> bool:
@@ -397,8 +857,6 @@ def eh_comentario_valido(comentario: str) -> bool:
     Returns:
         bool: True se o comentário for válido, False caso contrário
     """
-    import re
-
     if pd.isna(comentario):
         return False
 
@@ -407,8 +865,9 @@ def eh_comentario_valido(comentario: str) -> bool:
     if not comentario:
         return False
 
-    # Se o comentário tem 3 caracteres ou menos, é considerado inválido
-    if len(comentario) <= 3:
+    # Menos de 10 caracteres não comporta as 10 letras exigidas abaixo:
+    # descarta sem rodar as expressões regulares
+    if len(comentario) < 10:
         return False
 
     # Remover espaços e pontos para verificar se é apenas número
@@ -418,27 +877,33 @@ def eh_comentario_valido(comentario: str) -> bool:
     if comentario_limpo.isdigit():
         return False
 
-    # Contar quantas letras/palavras reais existem
-    palavras = re.findall(r'\b[a-zA-ZÀ-ÿ]{2,}\b', comentario)
+    # Verificar se o comentário tem pelo menos 10 caracteres alfabéticos
+    # (classe de caracteres simples: verificação mais barata primeiro)
+    letras = _REGEX_LETRA.findall(comentario)
+    if len(letras) < 10:
+        return False
+
+    # Contar quantas palavras reais existem
+    palavras = _REGEX_PALAVRA.findall(comentario)
 
     # Se não há pelo menos 2 palavras com 2+ letras, é inválido
     if len(palavras) < 2:
         return False
 
-    # Verificar se o comentário tem pelo menos 10 caracteres alfabéticos
-    letras = re.findall(r'[a-zA-ZÀ-ÿ]', comentario)
-    if len(letras) < 10:
-        return False
-
     return True
 
 
-def processar_comentarios_por_classificacao(df: pd.DataFrame) -> dict:
+def processar_comentarios_por_classificacao(df: pd.DataFrame,
+                                            top_n: int = MAX_COMENTARIOS_POR_CLASSIFICACAO) -> dict:
     """
-    Agrupa comentários por classificação.
+    Agrupa os comentários mais recentes por classificação.
+
+    Percorre os comentários do mais recente para o mais antigo e para assim
+    que cada classificação atinge top_n, sem validar o restante do DataFrame.
 
     Args:
         df: DataFrame com dados
+        top_n: Máximo de comentários por classificação
 
     Returns:
         dict: {classificacao: lista de dicts com comentários}
@@ -452,30 +917,47 @@ def processar_comentarios_por_classificacao(df: pd.DataFrame) -> dict:
     if df.empty:
         return comentarios
 
-    for classif in ['Promotor', 'Neutro', 'Detrator']:
-        df_classif = df[df['classificacao_empresa'] == classif].copy()
+    # Filtrar apenas com comentários não-nulos e não vazios, levando só as colunas usadas
+    colunas = ['customer_name', 'nota_media_empresa', 'classificacao_empresa', 'comentarios_consolidados']
+    tem_data = 'ultima_resposta' in df.columns
+    if tem_data:
+        colunas.append('ultima_resposta')
+
+    textos = df['comentarios_consolidados']
+    candidatos = df.loc[textos.notna() & (textos.astype(str).str.strip() != ''), colunas]
+
+    # Ordenar por data mais recente
+    if tem_data:
+        candidatos = candidatos.sort_values('ultima_resposta', ascending=False, kind='stable')
+        datas = candidatos['ultima_resposta']
+
+    # Percorrer arrays das colunas (sem montar uma tupla/Series por linha)
+    linhas = zip(
+        candidatos['customer_name'].to_numpy(),
+        candidatos['nota_media_empresa'].to_numpy(),
+        candidatos['classificacao_empresa'].to_numpy(),
+        candidatos['comentarios_consolidados'].to_numpy()
+    )
 
-        # Filtrar apenas com comentários não-nulos
-        df_classif = df_classif[df_classif['comentarios_consolidados'].notna()]
-        df_classif = df_classif[df_classif['comentarios_consolidados'].str.strip() != '']
+    for posicao, (empresa, nota, classificacao, comentario) in enumerate(linhas):
+        lista = comentarios.get(classificacao)
+        if lista is None or len(lista) >= top_n:
+            continue
 
         # Filtrar comentários que são apenas números
-        df_classif = df_classif[df_classif['comentarios_consolidados'].apply(eh_comentario_valido)]
-
-        # Ordenar por data mais recente
-        if 'ultima_resposta' in df_classif.columns:
-            df_classif = df_classif.sort_values('ultima_resposta', ascending=False)
-
-        # Pegar top 20
-        df_classif = df_classif.head(20)
+        if not eh_comentario_valido(comentario):
+            continue
+
+        lista.append({
+            'empresa': empresa,
+            'nota': nota,
+            # A data só é lida (e formatada) para os comentários aceitos
+            'data': formatar_data(datas.iat[posicao] if tem_data else None),
+            'comentario': comentario
+        })
 
-        for _, row in df_classif.iterrows():
-            comentarios[classif].append({
-                'empresa': row['customer_name'],
-                'nota': row['nota_media_empresa'],
-                'data': formatar_data(row.get('ultima_resposta')),
-                'comentario': row['comentarios_consolidados']
-            })
+        if all(len(v) >= top_n for v in comentarios.values()):
+            break
 
     return comentarios
 
@@ -494,16 +976,14 @@ def limpar_texto_para_wordcloud(texto: str, stopwords: set) -> str:
     if pd.isna(texto):
         return ""
 
-    import re
-
     # Converter para minúsculas
     texto = texto.lower()
 
     # Remover pontuação e caracteres especiais
-    texto = re.sub(r'[^\w\s]', ' ', texto)
+    texto = _REGEX_PONTUACAO.sub(' ', texto)
 
     # Remover números
-    texto = re.sub(r'\d+', '', texto)
+    texto = _REGEX_NUMEROS.sub('', texto)
 
     # Remover stopwords
     palavras = texto.split()
@@ -546,6 +1026,29 @@ def gerar_texto_wordcloud(df: pd.DataFrame, stopwords: set) -> str:
     return texto_limpo
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# EXPORTAÇÃO
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def gerar_csv(df: pd.DataFrame) -> bytes:
+    """
+    Serializa o DataFrame em CSV (UTF-8 com BOM, para abrir no Excel) usando
+    o escritor CSV do Arrow, em C++, em vez do DataFrame.to_csv.
+
+    Args:
+        df: DataFrame a exportar (o índice é descartado)
+
+    Returns:
+        bytes: Conteúdo do arquivo CSV
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+
+    buffer = io.BytesIO()
+    buffer.write(b"\xef\xbb\xbf")
+    pa_csv.write_csv(tabela, buffer)
+    return buffer.getvalue()
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # VALIDAÇÕES
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -560,17 +1063,12 @@ def validar_dados(df: pd.DataFrame) -> tuple:
     Returns:
         tuple: (bool: válido, str: mensagem de erro)
     """
-    colunas_obrigatorias = [
-        'customer_id', 'customer_name', 'tipo_cliente',
-        'qtd_frota', 'nota_media_empresa', 'classificacao_empresa'
-    ]
-
     if df.empty:
         return False, "DataFrame está vazio. Verifique a conexão com o BigQuery."
 
-    colunas_faltando = [col for col in colunas_obrigatorias if col not in df.columns]
+    colunas_faltando = COLUNAS_OBRIGATORIAS.difference(df.columns)
 
     if colunas_faltando:
-        return False, f"Colunas faltando: {', '.join(colunas_faltando)}"
+        return False, f"Colunas faltando: {', '.join(sorted(colunas_faltando))}"
 
     return True, "OK"